@@ -0,0 +1,107 @@
+# BMS 채널 재배치 (remap table) — 스트리밍으로 한 줄씩 처리
+# 빌더에서는 write_bms(..., remap=...)로 기록하면서 바로 적용 (두 번째 읽기/쓰기 없음)
+# 이미 있는 파일은 remap()으로 한 번 훑으며 변환 (메모리 = 한 마디)
+import os
+import re
+import sys
+from itertools import groupby
+
+from bms_append import merge_data
+from chart import BGM_CHANNEL
+from longnote import PLAYABLE, ln_channel
+
+input_bms = "output.bms"
+output_bms = "output_modified.bms"
+
+channel_line_re = re.compile(r"#(\d{3})([0-9A-Z]{2}):(.*)")
+LN_CHANNELS = {ln_channel(lane) for lane in PLAYABLE}
+
+# 1P/2P 플레이 레인 전부 → BGM (test-067 keysound-off 방식)
+# 롱노트 채널(51~59, 61~69)도 BGM — 머리만 남기고 꼬리는 버림, #LNOBJ 꼬리도 버림
+LANES_TO_BGM = {channel: BGM_CHANNEL for channel in sorted(PLAYABLE | LN_CHANNELS)}
+
+
+def remap_events(events, table):
+    # (measure, channel, num, den, id) 이벤트 스트림의 채널만 바꿈
+    # 같은 레인으로 모인 노트는 render_measure가 합치고 겹치면 충돌로 보고
+    if not table:
+        return events
+    return ((measure, table.get(channel, channel), num, den, value)
+            for measure, channel, num, den, value in events)
+
+
+def _drop_tails(data, channel, state):
+    # BGM으로 가는 롱노트: 머리만 남김
+    # state: {"lnobj": #LNOBJ 번호, 롱노트 채널 -> 머리가 열려 있는지} (마디를 넘어 이어지는 머리/꼬리 짝)
+    cells = [data[i:i + 2] for i in range(0, len(data), 2)]
+    for i, cell in enumerate(cells):
+        if cell == "00":
+            continue
+        if channel in LN_CHANNELS:
+            if state.get(channel):
+                cells[i] = "00"
+            state[channel] = not state.get(channel)
+        elif cell == state.get("lnobj"):
+            cells[i] = "00"
+    return "".join(cells)
+
+
+def _measure_lines(measure, lines, table, state):
+    # 한 마디 안의 채널 줄 변환, BGM이 아닌 채널이 겹치면 합침
+    merged = {}
+    for channel, data in lines:
+        source, channel = channel, table.get(channel, channel)
+        if channel == BGM_CHANNEL and source != BGM_CHANNEL:
+            data = _drop_tails(data, source, state)
+            if not data.strip("0"):
+                continue  # 꼬리만 있던 줄
+        if channel == BGM_CHANNEL:
+            yield f"#{measure}{channel}:{data}"
+        elif channel in merged:
+            merged[channel] = merge_data(merged[channel], data)
+        else:
+            merged[channel] = data
+    for channel, data in merged.items():
+        yield f"#{measure}{channel}:{data}"
+
+
+def remap_lines(lines, table, measure_gap=True):
+    # 줄 스트림 → 변환된 줄 스트림 (개행 없는 문자열)
+    # 연속된 같은 마디 줄만 모아서 처리하므로 파일 크기와 상관없이 메모리 일정
+    def key(line):
+        m = channel_line_re.fullmatch(line)
+        return m.group(1) if m else None
+
+    prev_measure = None
+    state = {}  # 롱노트 꼬리 버리기 (_drop_tails)
+    for measure, group in groupby((line.rstrip("\r\n") for line in lines), key=key):
+        if measure is None:
+            for line in group:
+                if line.startswith("#LNOBJ "):
+                    state["lnobj"] = line[7:9]
+                yield line
+            continue
+        # 이전 마디와 다른 경우, 마디 구분 개행 추가
+        if measure_gap and prev_measure is not None and measure != prev_measure:
+            yield ""
+        prev_measure = measure
+        channel_lines = [(line[4:6], line[7:]) for line in group]
+        yield from _measure_lines(measure, channel_lines, table, state)
+
+
+def remap(input_bms, output_bms, table=LANES_TO_BGM, measure_gap=True):
+    tmp_path = output_bms + ".tmp"
+    with open(input_bms, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+        for line in remap_lines(src, table, measure_gap):
+            dst.write(line + "\n")
+    os.replace(tmp_path, output_bms)
+
+
+if __name__ == "__main__":
+    # python after.py [입력] [출력]
+    if len(sys.argv) > 1:
+        input_bms = sys.argv[1]
+    if len(sys.argv) > 2:
+        output_bms = sys.argv[2]
+    remap(input_bms, output_bms)
+    print(f"완료! 수정된 BMS는 '{output_bms}'에 저장되었습니다.")
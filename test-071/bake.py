@@ -0,0 +1,31 @@
+import numpy as np
+
+from keysound import PcmBuffer, frames_to_float, float_to_frames
+
+# 키음 끄기(BGM) 차트용: BGM으로 가는 노트 구간을 스템 길이 WAV 하나로 미리 믹스
+# 노트 구간은 스템에서 잘라 같은 시각에 울리므로, 겹친 횟수만큼 스템을 더하는 overlap-add
+# → 구간별 배수(0, 1, 2 ...)를 블록 단위로 곱하기만 하면 됨
+
+BLOCK_FRAMES = 1 << 20
+
+
+def bake_stem(pcm, ranges, block_frames=BLOCK_FRAMES):
+    # ranges: [(start_ms, length_ms), ...] — 키음 구간 (스템 시각 = 차트 시각)
+    # 반환: 0초부터 마지막 구간 끝까지의 PcmBuffer (구간 밖은 무음)
+    ranges = np.asarray(ranges, dtype=np.float64).reshape(-1, 2)
+    starts = np.clip(np.round(ranges[:, 0] * pcm.sample_rate / 1000).astype(np.int64), 0, len(pcm))
+    ends = np.clip(np.round(ranges.sum(axis=1) * pcm.sample_rate / 1000).astype(np.int64), 0, len(pcm))
+    total = int(ends.max(initial=0))
+    frames = np.empty((total, pcm.channels * pcm.sample_width), dtype=np.uint8)
+
+    for b0 in range(0, total, block_frames):
+        b1 = min(b0 + block_frames, total)
+        hit = (starts < b1) & (ends > b0)
+        # 블록 안에서 프레임마다 몇 개의 구간이 겹치는지 (차분 배열 → 누적합)
+        diff = np.zeros(b1 - b0 + 1, dtype=np.int32)
+        np.add.at(diff, np.clip(starts[hit] - b0, 0, b1 - b0), 1)
+        np.add.at(diff, np.clip(ends[hit] - b0, 0, b1 - b0), -1)
+        count = np.cumsum(diff[:-1]).astype(np.float32)
+        mixed = frames_to_float(pcm.frames[b0:b1], pcm.sample_width, pcm.channels) * count[:, None]
+        frames[b0:b1] = float_to_frames(mixed, pcm.sample_width)
+    return PcmBuffer(frames, pcm.sample_rate, pcm.channels, pcm.sample_width)
@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import after
+import main
+
+# 곡 폴더 여러 개를 한 번에 빌드
+# 곡 폴더마다 song.json (main.py 설정 중 바꿀 것만) + MIDI/스템
+# 입력 파일 + 설정 해시가 지난 빌드와 같으면 건너뜀
+# python batch.py songs/ --workers 8
+
+MANIFEST_NAME = "song.json"
+STATE_NAME = ".build_state.json"
+HASH_CHUNK = 1 << 20
+
+DEFAULTS = {name: getattr(main, name) for name in main.SETTINGS}
+
+
+def load_manifest(song_dir):
+    with open(os.path.join(song_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    unknown = set(manifest) - set(main.SETTINGS)
+    if unknown:
+        raise ValueError(f"{song_dir}: 알 수 없는 설정 {', '.join(sorted(unknown))}")
+    settings = dict(DEFAULTS, export_workers=1)  # 병렬은 곡 단위로
+    settings.update(manifest)
+    if isinstance(settings["channel_remap"], str):
+        # "LANES_TO_BGM" 처럼 after.py 에 있는 표 이름
+        settings["channel_remap"] = getattr(after, settings["channel_remap"])
+    return settings
+
+
+def song_hash(song_dir, settings):
+    # 설정 + 입력 파일 내용 (MIDI, 스템)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for name in list(settings["midi_files"]) + list(settings["wav_files"]):
+        if name is None:
+            continue  # MIDI 없는 스템 (onset 검출)
+        h.update(name.encode("utf-8") + b"\0")
+        path = os.path.join(song_dir, name)
+        if not os.path.exists(path):
+            h.update(b"missing\0")
+            continue
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def load_state(song_dir):
+    try:
+        with open(os.path.join(song_dir, STATE_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(song_dir, state):
+    path = os.path.join(song_dir, STATE_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(song_dir, settings, digest):
+    return (load_state(song_dir).get("hash") == digest
+            and os.path.exists(os.path.join(song_dir, settings["bms_path"])))
+
+
+def build_song(song_dir, settings, digest):
+    # 워커 프로세스에서 실행: 곡 폴더로 이동해 처음부터 다시 빌드
+    # 키음 폴더와 색인은 남겨 두므로 바뀌지 않은 소리는 다시 내보내지 않음
+    cwd = os.getcwd()
+    os.chdir(song_dir)
+    try:
+        bms_path = settings["bms_path"]
+        for path in (bms_path, bms_path + ".idx.json"):
+            if os.path.exists(path):
+                os.remove(path)
+        main.main(**settings)
+    finally:
+        os.chdir(cwd)
+    save_state(song_dir, {"hash": digest})
+    return song_dir
+
+
+def find_songs(root):
+    return sorted(entry.path for entry in os.scandir(root)
+                  if entry.is_dir() and os.path.exists(os.path.join(entry.path, MANIFEST_NAME)))
+
+
+def build_all(root=".", workers=None, force=False):
+    # 반환: (빌드한 곡, 건너뛴 곡, 실패한 곡 {폴더: 에러})
+    stale = []
+    skipped = []
+    for song_dir in find_songs(root):
+        settings = load_manifest(song_dir)
+        digest = song_hash(song_dir, settings)
+        if not force and is_up_to_date(song_dir, settings, digest):
+            skipped.append(song_dir)
+        else:
+            stale.append((os.path.abspath(song_dir), settings, digest))
+
+    built = []
+    failed = {}
+    if workers == 1 or len(stale) <= 1:
+        for song_dir, settings, digest in stale:
+            try:
+                built.append(build_song(song_dir, settings, digest))
+            except Exception as e:
+                failed[song_dir] = repr(e)
+        return built, skipped, failed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_song, *task): task[0] for task in stale}
+        for future in as_completed(futures):
+            try:
+                built.append(future.result())
+            except Exception as e:
+                failed[futures[future]] = repr(e)
+    return sorted(built), skipped, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="song.json 이 있는 곡 폴더를 모두 빌드")
+    parser.add_argument("root", nargs="?", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 빌드할 곡 수")
+    parser.add_argument("--force", action="store_true", help="바뀌지 않은 곡도 다시 빌드")
+    args = parser.parse_args()
+
+    built, skipped, failed = build_all(args.root, args.workers, args.force)
+    for song_dir, error in failed.items():
+        print(f"❌ {song_dir}: {error}")
+    print(f"✅ 빌드 {len(built)}곡 / 건너뜀 {len(skipped)}곡 / 실패 {len(failed)}곡")
+    if failed:
+        raise SystemExit(1)
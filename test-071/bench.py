@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from mido import MidiFile, MidiTrack, Message, MetaMessage, bpm2tempo
+
+import after
+from bms_writer import tick_events, merge_events, write_bms
+from chart import MAX_MEASURE, Chart
+from dedup import KeysoundIndex
+from export_pool import ExportJob, export_keysounds
+from keysound import load_pcm, write_wav
+from note_table import NoteTable
+from tempo_map import TempoMap
+from wav_ids import MAX_ID, choose_base, to_id
+
+# MIDI → 키음 → BMS 전체 파이프라인 단계별 시간 측정
+# python bench.py --notes 5000 --stems 7 --length 240 --out bench.json
+
+framerate = 44100
+ticks_per_beat = 480
+
+
+# --- 단순 sine wave로 WAV 생성 함수 (test-044 note_to_wav, 파일 대신 샘플 반환) ---
+def note_to_wav(note, duration=500, filename=None, volume=-10.0):
+    t = np.linspace(0, duration/1000, int(framerate * duration/1000), False)
+    freq = 440.0 * 2 ** ((note - 69)/12.0)
+    wave = np.sin(freq * 2 * np.pi * t) * 10 ** (volume / 20)
+    audio = np.int16(wave * 32767)
+    if filename:
+        write_wav(filename, audio.view(np.uint8).reshape(-1, 2), framerate, 1, 2)
+    return audio
+
+
+def make_fixtures(work_dir, notes, stems, length_sec, polyphony, bpm, seed):
+    # 스템별 MIDI + 그 MIDI를 sine으로 렌더링한 WAV
+    rng = np.random.default_rng(seed)
+    total_ticks = int(length_sec * bpm / 60 * ticks_per_beat)
+    onsets_per_stem = max(notes // (stems * polyphony), 1)
+    grid = ticks_per_beat // 4  # 16분음표 격자
+    paths = []
+    for s in range(stems):
+        onsets = np.sort(rng.integers(0, total_ticks // grid, onsets_per_stem)) * grid
+        lengths = rng.integers(ticks_per_beat // 8, ticks_per_beat, onsets_per_stem)
+        pitches = rng.integers(36, 96, (onsets_per_stem, polyphony))
+
+        events = []
+        for onset, length, chord in zip(onsets.tolist(), lengths.tolist(), pitches.tolist()):
+            for pitch in chord:
+                events.append((onset, 1, Message("note_on", note=pitch, velocity=100)))
+                events.append((onset + length, 0, Message("note_off", note=pitch, velocity=0)))
+        events.sort(key=lambda e: (e[0], e[1]))
+
+        mid = MidiFile(ticks_per_beat=ticks_per_beat)
+        track = MidiTrack()
+        track.append(MetaMessage("set_tempo", tempo=bpm2tempo(bpm), time=0))
+        last = 0
+        for tick, _, msg in events:
+            track.append(msg.copy(time=tick - last))
+            last = tick
+        mid.tracks.append(track)
+        midi_path = os.path.join(work_dir, f"stem{s}.mid")
+        mid.save(midi_path)
+
+        sec_per_tick = 60 / bpm / ticks_per_beat
+        audio = np.zeros(int((length_sec + 2) * framerate), dtype=np.float32)
+        for onset, length, chord in zip(onsets.tolist(), lengths.tolist(), pitches.tolist()):
+            start = int(onset * sec_per_tick * framerate)
+            for pitch in chord:
+                tone = note_to_wav(pitch, duration=int(length * sec_per_tick * 1000)) / polyphony
+                audio[start:start + len(tone)] += tone
+        wav_path = os.path.join(work_dir, f"stem{s}.wav")
+        write_wav(wav_path, audio.astype(np.int16).view(np.uint8).reshape(-1, 2), framerate, 1, 2)
+        paths.append((midi_path, wav_path, f"stem{s}"))
+    return paths
+
+
+@contextmanager
+def timed(timings, stage):
+    start = time.perf_counter()
+    yield
+    timings[stage] = round(time.perf_counter() - start, 6)
+
+
+def run(notes=2000, stems=7, length_sec=180, polyphony=2, bpm=120, fmt="wav", workers=1, seed=0):
+    if length_sec * bpm / 60 / 4 > MAX_MEASURE:
+        # 마디 번호 3자리 — 합성/내보내기 전에 중단
+        raise ValueError(f"곡 길이 {length_sec}초 @ {bpm} BPM: BMS 마디 번호는 최대 {MAX_MEASURE}")
+    timings = {}
+    counts = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixtures = make_fixtures(work_dir, notes, stems, length_sec, polyphony, bpm, seed)
+        output_dir = os.path.join(work_dir, "notes")
+        os.makedirs(output_dir)
+
+        with timed(timings, "midi_parse"):
+            mids = [MidiFile(midi_path) for midi_path, _, _ in fixtures]
+        with timed(timings, "note_pairing"):
+            tables = [NoteTable.from_midi(mid) for mid in mids]
+        counts["notes"] = sum(len(table) for table in tables)
+
+        with timed(timings, "slicing"):
+            tempo = TempoMap(mids, bpm)  # main.py 와 같이 모든 MIDI의 템포를 합친 곡 템포 하나
+            pcms = [load_pcm(wav_path) for _, wav_path, _ in fixtures]
+            slices = []  # (stem 번호, onset tick, start_ms, length_ms, frames view)
+            for s, (table, pcm) in enumerate(zip(tables, pcms)):
+                onsets = table.onsets()
+                seconds = tempo.ticks_to_seconds(np.append(onsets, table.length_ticks))
+                # main.py 와 같이 ms는 소수 그대로 → 자를 때 프레임으로 반올림
+                starts_ms = seconds[:-1] * 1000
+                lengths_ms = np.maximum(np.diff(seconds) * 1000, 50)
+                for tick, start_ms, length_ms in zip(onsets.tolist(), starts_ms.tolist(), lengths_ms.tolist()):
+                    slices.append((s, tick, start_ms, length_ms, pcm.slice_ms(start_ms, length_ms)))
+        counts["slices"] = len(slices)
+
+        with timed(timings, "dedup"):
+            index = KeysoundIndex(output_dir)
+            ids = {}
+            jobs = []
+            events = [[] for _ in fixtures]
+            for s, tick, start_ms, length_ms, frames in slices:
+                key = index.key(pcms[s], frames, fmt)
+                if key not in ids:
+                    ids[key] = len(ids) + 1
+                    path = os.path.join(output_dir, f"{fixtures[s][2]}-{ids[key]}.{fmt}")
+                    jobs.append(ExportJob(fixtures[s][1], start_ms, length_ms, ids[key], path))
+                events[s].append((tick, ids[key]))
+        counts["keysounds"] = len(jobs)
+        base = choose_base(len(jobs))  # 1295개 넘으면 #BASE 62
+        # 3843개를 넘으면 실제 빌드는 실패하지만 (main.py), 벤치마크는 번호를 돌려 써서 끝까지 시간 측정
+        counts["wrapped_ids"] = max(len(jobs) - MAX_ID[base], 0)
+
+        def id_of(n):
+            return to_id((n - 1) % MAX_ID[base] + 1, base)
+
+        with timed(timings, "export"):
+            export_keysounds(jobs, fmt, workers)
+
+        with timed(timings, "layout"):
+            chart = Chart()
+            for s, stem_events in enumerate(events):
+                ticks, wav_ids = np.array(stem_events, dtype=np.int64).reshape(-1, 2).T
+                chart.add_ticks(f"{11 + s % 9:02}", ticks, tempo.ticks_per_measure, wav_ids)
+            counts["lines"] = len(chart.lines(id_of))
+
+        bms_path = os.path.join(work_dir, "output.bms")
+        with timed(timings, "bms_write"):
+            header = ["#BASE 62"] if base == 62 else []
+            header += [f"#WAV{id_of(job.wav_id)} notes/{os.path.basename(job.path)}" for job in jobs]
+            streams = []
+            for s, stem_events in enumerate(events):
+                ticks, wav_ids = np.array(stem_events, dtype=np.int64).reshape(-1, 2).T
+                streams.append(tick_events(f"{11 + s % 9:02}", ticks, wav_ids, tempo.ticks_per_measure))
+            write_bms(bms_path, header, merge_events(*streams), id_of)
+        counts["bms_bytes"] = os.path.getsize(bms_path)
+
+        with timed(timings, "after"):
+            after.remap(bms_path, os.path.join(work_dir, "output_modified.bms"))
+
+    params = {"notes": notes, "stems": stems, "length_sec": length_sec, "polyphony": polyphony,
+              "bpm": bpm, "format": fmt, "workers": workers, "seed": seed}
+    return {"params": params, "counts": counts, "stages": timings,
+            "total": round(sum(timings.values()), 6)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MIDI → keysound → BMS 파이프라인 벤치마크")
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--stems", type=int, default=7)
+    parser.add_argument("--length", type=float, default=180, help="곡 길이 (초)")
+    parser.add_argument("--polyphony", type=int, default=2)
+    parser.add_argument("--bpm", type=float, default=120)
+    parser.add_argument("--format", default="wav")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    result = run(args.notes, args.stems, args.length, args.polyphony, args.bpm,
+                 args.format, args.workers, args.seed)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
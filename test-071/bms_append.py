@@ -0,0 +1,261 @@
+import json
+import os
+import re
+from bisect import bisect_right
+from collections import Counter
+from fractions import Fraction
+from math import lcm
+
+from wav_ids import parse_id, rebase_id
+
+MAIN_DATA_MARK = b"*---------------------- MAIN DATA FIELD"
+COPY_CHUNK = 1 << 20
+# 값이 하나뿐인 헤더 — 새 값을 주면 원래 줄을 그 자리에서 바꿈 (없으면 헤더 끝에 추가)
+REPLACED_HEADERS = ("#LNTYPE",)
+
+channel_line_re = re.compile(rb"#(\d{3})([0-9A-Z]{2}):(.*)")
+wav_line_re = re.compile(rb"#WAV([0-9A-Za-z]{2}) (.+)")
+
+
+def merge_data(old, new):
+    # 같은 마디/채널 데이터 합치기: 두 해상도의 최소공배수로 펼친 뒤 new의 노트가 우선
+    old_cells = [old[i:i + 2] for i in range(0, len(old), 2)] or ["00"]
+    new_cells = [new[i:i + 2] for i in range(0, len(new), 2)] or ["00"]
+    size = lcm(len(old_cells), len(new_cells))
+    merged = ["00"] * size
+    for cells in (old_cells, new_cells):
+        step = size // len(cells)
+        for i, cell in enumerate(cells):
+            if cell != "00":
+                merged[i * step] = cell
+    return "".join(merged)
+
+
+def bgm_notes(lines):
+    # 01 줄들 → Counter{(마디 내 위치, 번호): 개수} (해상도가 달라도 같은 위치면 같은 키)
+    notes = Counter()
+    for data in lines:
+        cells = [data[i:i + 2] for i in range(0, len(data), 2)]
+        notes.update((Fraction(i, len(cells)), cell) for i, cell in enumerate(cells) if cell != "00")
+    return notes
+
+
+def new_bgm_data(existing, data):
+    # 01 BGM은 줄을 쌓을 수 있으므로 병합 대신 줄 추가 — 단, 이미 있는 노트(같은 위치/같은 번호)는 빼서 중복 재생 방지
+    # existing: bgm_notes() Counter, 뺀 만큼 줄어듦 (같은 마디의 다음 줄과 나눠 씀)
+    # 반환: 새로 더할 데이터 (남는 노트가 없으면 None)
+    cells = [data[i:i + 2] for i in range(0, len(data), 2)]
+    for i, cell in enumerate(cells):
+        note = (Fraction(i, len(cells)), cell)
+        if cell != "00" and existing[note] > 0:
+            existing[note] -= 1
+            cells[i] = "00"
+    if all(cell == "00" for cell in cells):
+        return None
+    return "".join(cells)
+
+
+class BmsAppender:
+    # output.bms 옆에 사이드카 색인(output.bms.idx.json)을 두고
+    # 새 #WAV / 채널 줄만 스트리밍 한 번으로 끼워 넣음
+    def __init__(self, bms_path):
+        self.bms_path = bms_path
+        self.index_path = bms_path + ".idx.json"
+        self.index = self._load_index() or self._scan()
+
+    # --- 색인 ---
+    def _stat(self):
+        st = os.stat(self.bms_path)
+        return st.st_size, st.st_mtime_ns
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return None
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if (index.get("size"), index.get("mtime_ns")) != self._stat():
+            return None  # 사이드카 이후 파일이 바뀜 → 다시 스캔
+        if "header_start" not in index or "header_at" not in index:
+            return None  # 예전 형식 색인
+        return index
+
+    def _scan(self):
+        # 색인이 없을 때만 전체를 한 번 훑음
+        index = {"header_start": None, "header_end": None, "max_wav_id": 0, "wav_files": {},
+                 "headers": [], "header_at": {}, "lines": {}, "ends_with_newline": True}
+        offset = 0
+        first_channel = None
+        labels = []  # (파일, #WAV 이름) — #BASE 를 알고 나서 번호로
+        with open(self.bms_path, "rb") as f:
+            for raw in f:
+                line = raw.rstrip(b"\r\n")
+                if line.startswith(b"#") and index["header_start"] is None:
+                    index["header_start"] = offset
+                if line.startswith(MAIN_DATA_MARK) and index["header_end"] is None:
+                    index["header_end"] = offset
+                elif m := channel_line_re.match(line):
+                    if first_channel is None:
+                        first_channel = offset
+                    key = (m.group(1) + m.group(2)).decode()
+                    index["lines"].setdefault(key, []).append([offset, len(raw)])
+                elif m := wav_line_re.match(line):
+                    labels.append((m.group(2).decode("utf-8").strip(), m.group(1).decode()))
+                elif line.startswith(b"#"):
+                    header = line.decode("utf-8")
+                    index["headers"].append(header)
+                    if (command := header.split(" ", 1)[0]) in REPLACED_HEADERS:
+                        index["header_at"][command] = [offset, len(raw)]
+                offset += len(raw)
+                index["ends_with_newline"] = raw.endswith(b"\n")
+        if index["header_end"] is None:
+            index["header_end"] = first_channel if first_channel is not None else offset
+        if index["header_start"] is None or index["header_start"] > index["header_end"]:
+            index["header_start"] = index["header_end"]
+        index["base"] = 62 if "#BASE 62" in index["headers"] else 36
+        for filename, label in labels:
+            wav_id = parse_id(label, index["base"])
+            index["wav_files"][filename] = wav_id
+            index["max_wav_id"] = max(index["max_wav_id"], wav_id)
+        return index
+
+    def _save_index(self):
+        self.index["size"], self.index["mtime_ns"] = self._stat()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    # --- 조회 ---
+    @property
+    def next_wav_id(self):
+        return self.index["max_wav_id"] + 1
+
+    @property
+    def base(self):
+        return self.index.get("base", 36)
+
+    def _rebase(self, base):
+        # #BASE 62 추가: 기존 #WAV 이름은 그대로 두고 번호만 새 진법으로 다시 읽음
+        old = self.base
+        self.index["wav_files"] = {f: rebase_id(i, old, base) for f, i in self.index["wav_files"].items()}
+        self.index["max_wav_id"] = max(self.index["wav_files"].values(), default=0)
+        self.index["base"] = base
+
+    @property
+    def wav_files(self):
+        return self.index["wav_files"]
+
+    def has_header(self, line):
+        return line in self.index["headers"]
+
+    def read_lines(self, measure, channel):
+        # 색인의 바이트 위치로 해당 줄만 읽음
+        result = []
+        with open(self.bms_path, "rb") as f:
+            for offset, length in self.index["lines"].get(f"{measure:03}{channel}", []):
+                f.seek(offset)
+                m = channel_line_re.match(f.read(length).rstrip(b"\r\n"))
+                result.append(m.group(3).decode())
+        return result
+
+    # --- 쓰기 ---
+    def append(self, header_lines, channel_lines):
+        # header_lines: ["#WAV.. ..", "#BPM.. .."] — MAIN DATA 앞에 삽입
+        #   단 #BASE 는 헤더 맨 앞 (첫 #WAV 보다 먼저 — 읽는 순서대로 진법을 적용하는 플레이어)
+        #   REPLACED_HEADERS (#LNTYPE) 는 원래 줄이 있으면 그 자리에서 바꿈
+        # channel_lines: [(measure, channel, data)] — 기존 줄이 있으면 병합(01 BGM은 없던 노트만 줄 추가)
+        replaced = []
+        new_lines = []
+        existing_bgm = {}  # 마디 -> 파일에 이미 있는 01 노트
+        for measure, channel, data in sorted(channel_lines):
+            key = f"{measure:03}{channel}"
+            if channel == "01":
+                if key not in existing_bgm:
+                    existing_bgm[key] = bgm_notes(self.read_lines(measure, channel))
+                data = new_bgm_data(existing_bgm[key], data)
+                if data is None:
+                    continue
+            elif key in self.index["lines"]:
+                for old in self.read_lines(measure, channel):
+                    data = merge_data(old, data)
+                replaced.extend(self.index["lines"].pop(key))
+            new_lines.append((key, f"#{key}:{data}\n".encode()))
+        replaced.sort()
+
+        # 편집 목록: (원래 위치, 지울 길이, 쓸 바이트, 헤더 명령 — 채널 줄은 None)
+        header_start = self.index["header_start"]
+        header_end = self.index["header_end"]
+        header_at = self.index["header_at"]
+        edits = []
+        for line in header_lines:
+            command = line.split(" ", 1)[0]
+            data = (line + "\n").encode("utf-8")
+            if command == "#BASE":
+                edits.append((header_start, 0, data, command))
+            elif command in header_at:
+                edits.append((*header_at[command], data, command))
+            else:
+                edits.append((header_end, 0, data, command))
+        edits.extend((offset, length, b"", None) for offset, length in replaced)
+        edits.sort(key=lambda e: (e[0], e[1]))  # 같은 위치면 삽입 먼저, 삽입끼리는 주어진 순서
+
+        old_size = os.path.getsize(self.bms_path)
+        add_newline = not self.index["ends_with_newline"] and bool(new_lines)
+        written = {}  # 헤더 명령 -> [새 위치, 길이]
+        tmp_path = self.bms_path + ".tmp"
+        with open(self.bms_path, "rb") as src, open(tmp_path, "wb") as dst:
+            for offset, length, data, command in edits:
+                self._copy(src, dst, offset - src.tell())
+                if command in REPLACED_HEADERS:
+                    written[command] = [dst.tell(), len(data)]
+                dst.write(data)
+                src.seek(length, os.SEEK_CUR)
+            self._copy(src, dst, None)
+            if add_newline:
+                dst.write(b"\n")
+            appended = []
+            for key, line in new_lines:
+                appended.append((key, dst.tell(), len(line)))
+                dst.write(line)
+            self.index["ends_with_newline"] = bool(new_lines) or self.index["ends_with_newline"]
+        os.replace(tmp_path, self.bms_path)
+
+        # 색인 갱신: 앞쪽에서 삽입/삭제된 바이트만큼 기존 위치 이동
+        edit_at = [offset for offset, *_ in edits]
+        edit_sum = [0]
+        for _, length, data, _ in edits:
+            edit_sum.append(edit_sum[-1] + len(data) - length)
+        for entries in [*self.index["lines"].values(), header_at.values()]:
+            for entry in entries:
+                if add_newline and entry[0] + entry[1] == old_size:
+                    entry[1] += 1  # 개행 없이 끝나던 마지막 줄
+                entry[0] += edit_sum[bisect_right(edit_at, entry[0])]
+        header_at.update(written)
+        for key, offset, length in appended:
+            self.index["lines"].setdefault(key, []).append([offset, length])
+        if "#BASE 62" in header_lines and self.base != 62:
+            self._rebase(62)
+        for line in header_lines:
+            if m := wav_line_re.match(line.encode("utf-8")):
+                wav_id = parse_id(m.group(1).decode(), self.base)
+                self.index["wav_files"][m.group(2).decode("utf-8").strip()] = wav_id
+                self.index["max_wav_id"] = max(self.index["max_wav_id"], wav_id)
+                continue
+            command = line.split(" ", 1)[0]
+            if command in REPLACED_HEADERS:
+                self.index["headers"] = [h for h in self.index["headers"] if h.split(" ", 1)[0] != command]
+            self.index["headers"].append(line)
+        self.index["header_end"] = header_end + sum(len(data) - length for _, length, data, command in edits
+                                                    if command is not None)
+        self._save_index()
+
+    @staticmethod
+    def _copy(src, dst, size):
+        # size 바이트(None이면 끝까지)를 청크 단위로 복사
+        while size is None or size > 0:
+            chunk = src.read(COPY_CHUNK if size is None else min(size, COPY_CHUNK))
+            if not chunk:
+                break
+            dst.write(chunk)
+            if size is not None:
+                size -= len(chunk)
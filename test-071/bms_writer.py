@@ -0,0 +1,53 @@
+import heapq
+import os
+from itertools import groupby
+
+import numpy as np
+
+from after import remap_events
+from chart import grid_cells, render_measure
+
+MAIN_DATA_MARK = "*---------------------- MAIN DATA FIELD"
+
+
+def tick_events(channel, ticks, ids, ticks_per_measure, division=None):
+    # 정렬된 tick 배열 → (measure, channel, num, den, id) 를 하나씩 생성
+    # division을 주면 Chart.add_ticks 와 같은 방식으로 반올림
+    if division:
+        measures, offsets = np.divmod(grid_cells(ticks, ticks_per_measure, division), division)
+        den = division
+    else:
+        measures, offsets = np.divmod(np.asarray(ticks, dtype=np.int64), ticks_per_measure)
+        den = ticks_per_measure
+    for measure, offset, wav_id in zip(measures.tolist(), offsets.tolist(), np.atleast_1d(ids).tolist()):
+        yield measure, channel, offset, den, wav_id
+
+
+def merge_events(*sources):
+    # 스템별로 시간순 정렬된 이벤트 스트림을 하나로 (마디 순)
+    return heapq.merge(*sources, key=lambda e: e[0])
+
+
+def iter_measure_lines(events, to_id, collisions=None):
+    # 마디 순 이벤트 → 마디가 끝날 때마다 그 마디의 줄을 내보냄 (메모리 = 한 마디)
+    for measure, measure_events in groupby(events, key=lambda e: e[0]):
+        by_channel = {}
+        for _, channel, num, den, value in measure_events:
+            by_channel.setdefault(channel, []).append((num, den, value))
+        for channel in sorted(by_channel):
+            nums, dens, values = zip(*by_channel[channel])
+            for data in render_measure(measure, channel, nums, dens, values, to_id, collisions):
+                yield f"#{measure:03}{channel}:{data}"
+
+
+def write_bms(path, header_lines, events, to_id, collisions=None, remap=None):
+    # 헤더 → MAIN DATA 줄을 순서대로 바로 파일에 기록 후 원자적으로 교체
+    # remap: 채널 재배치 표 {"11": "01", ...} — 기록하면서 적용
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in header_lines:
+            f.write(line + "\n")
+        f.write(MAIN_DATA_MARK + "\n")
+        for line in iter_measure_lines(remap_events(events, remap), to_id, collisions):
+            f.write(line + "\n")
+    os.replace(tmp_path, path)
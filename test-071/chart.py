@@ -0,0 +1,120 @@
+from math import gcd, lcm
+
+import numpy as np
+
+from intervals import partition_intervals
+
+BGM_CHANNEL = "01"
+MAX_MEASURE = 999  # 마디 번호는 3자리 (#000~#999)
+
+
+def _compact(cells):
+    # 노트가 있는 칸 위치의 최대공약수로 줄여 가장 작은 정확한 분할로
+    step = len(cells)
+    for i, cell in enumerate(cells):
+        if cell != "00":
+            step = gcd(step, i)
+    return cells[::step or 1]
+
+
+def grid_cells(ticks, ticks_per_measure, division):
+    # tick → 곡 처음부터 센 division 격자 칸 번호 (가장 가까운 칸으로 반올림)
+    ticks = np.asarray(ticks, dtype=np.int64)
+    return (ticks * division * 2 + ticks_per_measure) // (ticks_per_measure * 2)
+
+
+def cell_ticks(cells, ticks_per_measure, division):
+    # 격자 칸 번호 → 그 칸에 가장 가까운 tick (grid_cells로 다시 반올림하면 같은 칸)
+    cells = np.asarray(cells, dtype=np.int64)
+    return (cells * ticks_per_measure * 2 + division) // (division * 2)
+
+
+def measure_of(ticks, ticks_per_measure, division=None):
+    # tick → 놓이는 마디 번호 (Chart.add_ticks 와 같은 반올림 — 마디 끝 칸은 다음 마디로)
+    if division:
+        return grid_cells(ticks, ticks_per_measure, division) // division
+    return np.asarray(ticks, dtype=np.int64) // ticks_per_measure
+
+
+def render_measure(measure, channel, nums, dens, values, to_id, collisions=None):
+    # 한 마디/한 채널의 이벤트 → 데이터 문자열 목록
+    # 분모의 최소공배수로 펼친 뒤 가장 작은 정확한 분할로 줄임
+    # 같은 칸 충돌: BGM(01)은 줄을 하나 더 쓰고, 그 외 채널은 나중 노트가 남고 collisions에 기록
+    if measure > MAX_MEASURE:
+        raise ValueError(f"마디 #{measure}: BMS 마디 번호는 최대 {MAX_MEASURE}")
+    resolution = lcm(*dens)
+    cells_at = [num * resolution // den for num, den in zip(nums, dens)]
+    if channel == BGM_CHANNEL:
+        # 같은 칸 BGM은 구간 분할로 줄 배정 (칸 하나 = [cell, cell+1) 구간)
+        row_of, n_rows = partition_intervals(cells_at, [cell + 1 for cell in cells_at])
+        row_of = row_of.tolist()
+    else:
+        row_of, n_rows = [0] * len(cells_at), 1
+    rows = [["00"] * resolution for _ in range(n_rows)]
+    taken = {}  # 칸 -> [id, ...]
+    for cell, row, value in zip(cells_at, row_of, values):
+        taken.setdefault(cell, []).append(value)
+        rows[row][cell] = f"{value:02X}" if channel == "03" else to_id(value)
+    if collisions is not None and channel != BGM_CHANNEL:
+        for cell, stacked in taken.items():
+            if len(set(stacked)) > 1:
+                collisions.append((channel, measure, cell, resolution, stacked))
+    return ["".join(_compact(cells)) for cells in rows]
+
+
+class Chart:
+    # 노트를 채널별 희소 배열 (마디, 분자, 분모, WAV 번호)로 보관
+    # "00" 칸은 BMS 텍스트로 바꿀 때만 만들어짐 → 메모리 O(노트 수)
+    def __init__(self):
+        self._chunks = {}  # channel -> [(measure, num, den, id) 배열 묶음, ...]
+        self.collisions = []  # (channel, measure, 칸, 해상도, [덮어쓴 id..., 남은 id])
+
+    def add(self, channel, measures, numerators, denominators, ids):
+        # 배열 단위로 한 번에 추가
+        columns = [np.atleast_1d(np.asarray(c, dtype=np.int64))
+                   for c in (measures, numerators, denominators, ids)]
+        columns = np.broadcast_arrays(*columns)
+        self._chunks.setdefault(channel, []).append(np.stack(columns))
+
+    def add_ticks(self, channel, ticks, ticks_per_measure, ids, division=None):
+        # tick 정수로 정확히 배치 (분수 = 마디 내 tick / 마디 tick)
+        # division을 주면 그 분할로 반올림 (예전 방식)
+        if division:
+            measures, offsets = np.divmod(grid_cells(ticks, ticks_per_measure, division), division)
+            self.add(channel, measures, offsets, division, ids)
+        else:
+            measures, offsets = np.divmod(np.asarray(ticks, dtype=np.int64), ticks_per_measure)
+            self.add(channel, measures, offsets, ticks_per_measure, ids)
+
+    def channels(self):
+        return sorted(self._chunks)
+
+    def events(self, channel):
+        # (4, n) 배열: measure, num, den, id — 분수는 기약분수로 정리
+        events = np.concatenate(self._chunks[channel], axis=1)
+        g = np.gcd(events[1], events[2])
+        g[g == 0] = 1
+        events[1] //= g
+        events[2] //= g
+        return events
+
+    def __len__(self):
+        return sum(chunk.shape[1] for chunks in self._chunks.values() for chunk in chunks)
+
+    def lines(self, to_id):
+        # [(measure, channel, data)] — 채널/마디 순
+        result = []
+        self.collisions = []
+        for channel in self.channels():
+            measures, nums, dens, ids = self.events(channel)
+            if not len(measures):
+                continue
+            order = np.argsort(measures, kind="stable")
+            measures, nums, dens, ids = measures[order], nums[order], dens[order], ids[order]
+            bounds = np.flatnonzero(np.diff(measures)) + 1
+            for group in np.split(np.arange(len(measures)), bounds):
+                measure = int(measures[group[0]])
+                for data in render_measure(measure, channel, nums[group].tolist(), dens[group].tolist(),
+                                           ids[group].tolist(), to_id, self.collisions):
+                    result.append((measure, channel, data))
+        return result
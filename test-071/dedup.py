@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from keysound import as_bytes, frames_to_float
+
+INDEX_NAME = ".keysound_index.json"
+
+
+def exact_key(frames):
+    # PCM 바이트 그대로의 해시 — 완전히 같은 소리만 합침
+    return hashlib.blake2b(as_bytes(frames), digest_size=16).hexdigest()
+
+
+def fuzzy_key(frames, sample_width, channels, bins=32, step_db=1.5, length_ms_step=10, sample_rate=44100,
+              band_step_db=6):
+    # 허용 오차 모드: 모노 다운믹스 → 구간별 RMS(dB)를 step_db 단위로 양자화한 엔벨로프 + 길이
+    # + 스펙트럼: 가장 센 주파수의 반음 번호 + 옥타브 대역별 에너지(band_step_db 단위)
+    # 미세한 잡음/디더 차이는 같은 키, 음높이/음색이 다르면 엔벨로프가 같아도 다른 키
+    samples = frames_to_float(frames, sample_width, channels).mean(axis=1)
+    length_bucket = int(len(samples) * 1000 / sample_rate // length_ms_step)
+    if len(samples) < bins:
+        samples = np.pad(samples, (0, bins - len(samples)))
+    usable = len(samples) // bins * bins
+    rms = np.sqrt(np.mean(samples[:usable].reshape(bins, -1) ** 2, axis=1))
+    envelope = np.round(20 * np.log10(np.maximum(rms, 1e-5)) / step_db).astype(np.int16)
+
+    power = np.abs(np.fft.rfft(samples * np.hanning(len(samples)))) ** 2
+    freqs = np.fft.rfftfreq(len(samples), 1 / sample_rate)
+    peak = freqs[1:][power[1:].argmax()] if len(power) > 1 and power[1:].max() > 1e-12 else 0.0
+    semitone = int(round(69 + 12 * np.log2(peak / 440))) if peak > 0 else -1
+    edges = 32.0 * 2 ** np.arange(11)  # 32Hz ~ 16kHz 옥타브 대역
+    total = np.concatenate(([0.0], np.cumsum(power)))
+    idx = np.searchsorted(freqs, edges)
+    band = total[idx[1:]] - total[idx[:-1]]
+    bands = np.round(10 * np.log10(np.maximum(band / max(float(band.max()), 1e-12), 1e-6)) / band_step_db)
+    spectrum = np.concatenate(([semitone], bands)).astype(np.int16)
+
+    digest = hashlib.blake2b(envelope.tobytes() + spectrum.tobytes(), digest_size=16).hexdigest()
+    return f"{length_bucket}-{digest}"
+
+
+class KeysoundIndex:
+    # 소리 내용 해시 → notes/ 안의 파일명 (디스크에 저장해 다음 빌드/append에서 재사용)
+    def __init__(self, output_dir, mode="exact"):
+        self.output_dir = output_dir
+        self.mode = mode
+        self.path = os.path.join(output_dir, INDEX_NAME)
+        self.entries = {}
+        self.pending = set()  # 이번 빌드에서 내보낼 예정인 파일
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self.keys_by_file = {filename: key for key, filename in self.entries.items()}
+
+    def key(self, pcm, frames, fmt):
+        if self.mode == "fuzzy":
+            digest = fuzzy_key(frames, pcm.sample_width, pcm.channels, sample_rate=pcm.sample_rate)
+        else:
+            digest = exact_key(frames)
+        # PCM 형식도 키에 포함 — 바이트가 같아도 샘플레이트/채널/샘플 폭이 다르면 길이와 소리가 다름
+        return f"{self.mode}:{fmt}:{pcm.sample_rate}:{pcm.channels}:{pcm.sample_width}:{digest}"
+
+    def lookup(self, key):
+        # 색인에 있어도 파일이 지워졌으면 없는 것으로 처리
+        filename = self.entries.get(key)
+        if filename and (filename in self.pending
+                         or os.path.exists(os.path.join(self.output_dir, filename))):
+            return filename
+        return None
+
+    def add(self, key, filename):
+        # 같은 이름으로 다른 소리를 덮어쓰면 예전 키는 무효
+        old_key = self.keys_by_file.get(filename)
+        if old_key is not None and old_key != key:
+            del self.entries[old_key]
+        self.entries[key] = filename
+        self.keys_by_file[filename] = key
+        self.pending.add(filename)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,62 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from keysound import load_pcm, export_slices, export_stream, is_lossy, is_streamed, ENCODE_BATCH
+
+# 키음 하나 = 스템 파일의 [start_ms, start_ms+length_ms) 구간
+ExportJob = namedtuple("ExportJob", "stem start_ms length_ms wav_id path")
+
+# 워커 프로세스별 최근 스템 (같은 스템 청크가 이어지면 재디코딩 없음)
+_last_stem = [None, None]
+
+
+def _stem_pcm(stem, cache_dir=None):
+    if _last_stem[0] != stem:
+        _last_stem[0] = stem
+        _last_stem[1] = load_pcm(stem, cache_dir)
+    return _last_stem[1]
+
+
+def _export_chunk(stem, fmt, chunk, cache_dir=None, backend="atrim"):
+    if is_streamed(stem, cache_dir):
+        export_stream(stem, chunk, fmt, backend=backend)
+        return len(chunk)
+    pcm = _stem_pcm(stem, cache_dir)
+    export_slices(pcm, [(pcm.ms_to_frame(start_ms), pcm.ms_to_frame(start_ms + length_ms), path)
+                        for start_ms, length_ms, path in chunk], fmt, backend=backend)
+    return len(chunk)
+
+
+def _make_tasks(jobs, fmt, workers, cache_dir=None, backend="atrim"):
+    # 스템별로 묶은 뒤, 워커 수에 맞춰 시작 시간 순 청크로 나눔
+    by_stem = {}
+    for job in jobs:
+        by_stem.setdefault(job.stem, []).append(job)
+
+    chunk_size = max(ENCODE_BATCH, -(-len(jobs) // (workers * 4)))
+    tasks = []
+    for stem, stem_jobs in by_stem.items():
+        stem_jobs.sort(key=lambda j: (j.start_ms, j.wav_id))
+        # 스트리밍 스템은 청크마다 처음부터 디코딩하게 되므로 스템당 한 작업
+        # segment 백엔드도 스템 전체를 인코더 한 번에 넘기므로 스템당 한 작업
+        whole = is_streamed(stem, cache_dir) or (backend == "segment" and is_lossy(fmt))
+        size = len(stem_jobs) if whole else chunk_size
+        for i in range(0, len(stem_jobs), size):
+            chunk = [(j.start_ms, j.length_ms, j.path) for j in stem_jobs[i:i + size]]
+            tasks.append((stem, fmt, chunk, cache_dir, backend))
+    return tasks
+
+
+def export_keysounds(jobs, fmt="wav", workers=None, cache_dir=None, backend="atrim"):
+    # WAV 번호/파일명은 호출 측에서 미리 정해서 넘김 → 워커 수와 무관하게 결과 동일
+    # cache_dir: 압축 스템 디코딩 캐시 (load_pcm 참고)
+    # backend: mp3/ogg 인코딩 방식 (export_slices 참고)
+    workers = workers or os.cpu_count() or 1
+    tasks = _make_tasks(jobs, fmt, workers, cache_dir, backend)
+    if workers == 1 or len(tasks) <= 1:
+        return sum(_export_chunk(*task) for task in tasks)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        futures = [pool.submit(_export_chunk, *task) for task in tasks]
+        return sum(f.result() for f in futures)
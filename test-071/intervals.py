@@ -0,0 +1,24 @@
+import heapq
+
+import numpy as np
+
+
+def partition_intervals(starts, ends):
+    # 겹치지 않게 최소 트랙 수로 분배 (구간 분할 문제, O(n log k))
+    # 시작 순으로 보면서, 가장 먼저 끝나는 트랙이 비었으면 재사용 / 아니면 새 트랙
+    # 반환: (구간별 트랙 번호 배열, 트랙 수)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    assignment = np.empty(len(starts), dtype=np.int64)
+    heap = []  # (끝 시간, 트랙 번호)
+    n_tracks = 0
+    for i in np.lexsort((ends, starts)).tolist():
+        start = int(starts[i])
+        if heap and heap[0][0] <= start:
+            _, track = heapq.heapreplace(heap, (int(ends[i]), heap[0][1]))
+        else:
+            track = n_tracks
+            n_tracks += 1
+            heapq.heappush(heap, (int(ends[i]), track))
+        assignment[i] = track
+    return assignment, n_tracks
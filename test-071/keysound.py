@@ -0,0 +1,442 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import wave
+
+import numpy as np
+
+# 손실 포맷 → ffmpeg 인코더
+LOSSY_CODECS = {"mp3": "libmp3lame", "ogg": "libvorbis"}
+# 손실 포맷 → 인코더 패킷 하나의 최대 프레임 수 (segment 경계 허용 오차)
+PACKET_FRAMES = {"mp3": 1152, "ogg": 2048}
+# 샘플 폭(byte) → ffmpeg raw PCM 포맷
+RAW_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}
+# ffmpeg 1회 호출에 묶을 슬라이스 수
+ENCODE_BATCH = 64
+# 디코딩 캐시 폴더 안의 원본 해시 색인 (경로 → 크기, 수정 시각, 해시)
+CACHE_INDEX_NAME = "sources.json"
+HASH_CHUNK = 1 << 20
+# 스트리밍 디코딩 때 ffmpeg 파이프에서 한 번에 읽을 프레임 수
+STREAM_CHUNK = 1 << 16
+# 디코딩 캐시 .npy 헤더 길이 (고정 — 프레임 수는 디코딩이 끝난 뒤 덮어씀)
+NPY_HEADER = 128
+
+
+def ms_to_frame(ms, sample_rate):
+    # ms(소수 포함) → 가장 가까운 프레임 — 차트 배치(tick 시각)와 같은 반올림이라 키음 시작이 어긋나지 않음
+    return int(round(ms * sample_rate / 1000))
+
+
+def is_lossy(fmt):
+    return fmt in LOSSY_CODECS
+
+
+class PcmBuffer:
+    # 스템 전체를 한 번만 디코딩한 PCM
+    # frames: (프레임 수, 블록 바이트) uint8 배열 — 슬라이스는 모두 이 배열의 view
+    def __init__(self, frames, sample_rate, channels, sample_width):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    def __len__(self):
+        return len(self.frames)
+
+    def ms_to_frame(self, ms):
+        return min(max(ms_to_frame(ms, self.sample_rate), 0), len(self.frames))
+
+    def slice(self, start_frame, end_frame):
+        return self.frames[start_frame:end_frame]
+
+    def slice_ms(self, start_ms, length_ms):
+        # audio[start_ms:start_ms+length_ms] 구간 (복사 없음), ms는 소수 그대로 받아 프레임으로 반올림
+        return self.slice(self.ms_to_frame(start_ms), self.ms_to_frame(start_ms + length_ms))
+
+
+def as_bytes(frames):
+    # 프레임 view → 1차원 바이트 memoryview (연속 배열이면 복사 없음, 빈 구간도 허용)
+    return memoryview(np.ascontiguousarray(frames).reshape(-1))
+
+
+def frames_to_float(frames, sample_width, channels):
+    # raw 프레임 → (프레임 수, 채널) float32 (32비트는 float64), -1.0 ~ 1.0 (분석/믹싱용 복사본)
+    raw = np.ascontiguousarray(frames).reshape(-1)
+    if sample_width == 1:
+        samples = (raw.astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = raw.view("<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        b = raw.reshape(-1, 3).astype(np.int32)
+        ints = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8
+        samples = ints.astype(np.float32) / 8388608
+    else:
+        samples = raw.view("<i4") / 2147483648  # float64 — float32 로는 32비트 정수를 다 담지 못함
+    return samples.reshape(-1, channels)
+
+
+def float_to_frames(samples, sample_width):
+    # frames_to_float 의 반대: (프레임 수, 채널) float → raw 프레임 (같은 배율, 정수 범위 밖은 잘라냄)
+    # frames_to_float 결과를 그대로 넣으면 원래 프레임
+    n = len(samples)
+    if sample_width == 1:
+        raw = np.clip(np.round(np.asarray(samples, dtype=np.float32) * 128 + 128), 0, 255).astype(np.uint8)
+    elif sample_width == 2:
+        raw = np.clip(np.round(np.asarray(samples, dtype=np.float32) * 32768), -32768, 32767).astype("<i2")
+    elif sample_width == 3:
+        ints = np.clip(np.round(np.asarray(samples, dtype=np.float32) * 8388608), -8388608, 8388607).astype("<i4")
+        raw = ints.view(np.uint8).reshape(-1, 4)[:, :3]
+    else:
+        raw = np.clip(np.round(np.asarray(samples, dtype=np.float64) * 2147483648),
+                      -2147483648, 2147483647).astype("<i4")
+    return np.ascontiguousarray(raw).view(np.uint8).reshape(n, -1)
+
+
+def _probe(path):
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=sample_rate,channels", "-of", "csv=p=0", path],
+        check=True, capture_output=True, text=True).stdout
+    sample_rate, channels = out.strip().split(",")[:2]
+    return int(sample_rate), int(channels)
+
+
+def _decode_ffmpeg(path):
+    # mp3/ogg/flac 등은 ffmpeg 프로세스 하나로 전체를 16bit PCM으로 디코딩
+    sample_rate, channels = _probe(path)
+    raw = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le",
+         "-ar", str(sample_rate), "-ac", str(channels), "pipe:1"],
+        check=True, capture_output=True).stdout
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 2 * channels)
+    return PcmBuffer(frames, sample_rate, channels, 2)
+
+
+def _source_hash(path, cache_dir):
+    # 원본 파일 내용 해시, 크기/수정 시각이 그대로면 지난번 값을 씀
+    index_path = os.path.join(cache_dir, CACHE_INDEX_NAME)
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    size, mtime_ns, digest = index.get(key, (None, None, None))
+    if (size, mtime_ns) == (st.st_size, st.st_mtime_ns):
+        return digest
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    digest = h.hexdigest()
+    index[key] = (st.st_size, st.st_mtime_ns, digest)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=0)
+    os.replace(tmp_path, index_path)
+    return digest
+
+
+def _load_cached(path, cache_dir):
+    # 디코딩한 PCM을 {해시}-{샘플레이트}-{채널}-{샘플폭}.npy 로 저장해 두고
+    # 다음 빌드/append 에서는 memmap으로 열기만 함 (디코딩 없음)
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = _source_hash(path, cache_dir)
+    for name in os.listdir(cache_dir):
+        if name.startswith(digest + "-") and name.endswith(".npy"):
+            sample_rate, channels, sample_width = (int(v) for v in name[len(digest) + 1:-4].split("-"))
+            frames = np.load(os.path.join(cache_dir, name), mmap_mode="r")
+            return PcmBuffer(frames, sample_rate, channels, sample_width)
+
+    # 스템 전체를 메모리에 올리지 않고 ffmpeg 스트림을 블록마다 .npy 로 바로 기록
+    sample_rate, channels = _probe(path)
+    cache_path = os.path.join(cache_dir, f"{digest}-{sample_rate}-{channels}-2.npy")
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    n_frames = 0
+    with open(tmp_path, "wb") as f:
+        f.write(_npy_header(0, 2 * channels))
+        for block in stream_blocks(path, sample_rate=sample_rate, channels=channels):
+            f.write(as_bytes(block.frames))
+            n_frames += len(block)
+        f.seek(0)
+        f.write(_npy_header(n_frames, 2 * channels))
+    os.replace(tmp_path, cache_path)
+    return PcmBuffer(np.load(cache_path, mmap_mode="r"), sample_rate, channels, 2)
+
+
+def _npy_header(n_frames, block):
+    # .npy 1.0 헤더, 공백으로 채워 길이를 NPY_HEADER 로 고정
+    text = repr({"descr": "|u1", "fortran_order": False, "shape": (n_frames, block)})
+    text = text.ljust(NPY_HEADER - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def _open_wav(path):
+    # RIFF 헤더만 한 번 읽고 data 청크를 memmap — 슬라이스는 파일 위치로 바로 접근
+    # 스템 전체를 메모리에 올리지 않으므로 메모리는 실제로 쓰는 구간만큼만 씀
+    # 정수 PCM만 처리, 그 외(float 등)는 ValueError → ffmpeg
+    file_size = os.path.getsize(path)
+    fmt = None
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"RIFF/WAVE 파일이 아님: {path}")
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"data 청크 없음: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size + (size & 1))
+                tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == 0xFFFE and size >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]  # WAVE_FORMAT_EXTENSIBLE 서브포맷
+                if tag != 1:
+                    raise ValueError(f"정수 PCM이 아님 (format {tag}): {path}")
+                fmt = (channels, sample_rate, block_align, (bits + 7) // 8)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"fmt 청크가 data 뒤에 있음: {path}")
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    channels, sample_rate, block_align, sample_width = fmt
+    if block_align != channels * sample_width:
+        raise ValueError(f"지원하지 않는 블록 크기 {block_align}: {path}")
+    # 녹음 중 끊긴 파일은 data 크기가 실제보다 클 수 있음 → 파일 끝까지만
+    n_frames = min(size, file_size - offset) // block_align
+    if n_frames == 0:
+        frames = np.zeros((0, block_align), dtype=np.uint8)
+    else:
+        frames = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(n_frames, block_align))
+    return PcmBuffer(frames, sample_rate, channels, sample_width)
+
+
+def load_pcm(path, cache_dir=None):
+    # WAV는 data 청크를 memmap으로 바로 열고, 그 외 포맷만 ffmpeg 사용
+    # cache_dir 을 주면 ffmpeg 디코딩 결과를 .npy 로 캐시
+    if os.path.splitext(path)[1].lower() == ".wav":
+        try:
+            return _open_wav(path)
+        except (ValueError, struct.error):
+            pass  # float WAV 등 → ffmpeg로 처리
+    if cache_dir:
+        return _load_cached(path, cache_dir)
+    return _decode_ffmpeg(path)
+
+
+def is_streamed(path, cache_dir=None):
+    # 캐시 없이 압축 스템을 읽을 때는 통째로 디코딩하지 않고 스트리밍
+    return not cache_dir and os.path.splitext(path)[1].lower() != ".wav"
+
+
+def stream_blocks(path, chunk_frames=STREAM_CHUNK, sample_rate=None, channels=None):
+    # ffmpeg 파이프 하나로 앞에서부터 디코딩한 16bit PCM을 chunk_frames 단위 PcmBuffer로
+    if sample_rate is None or channels is None:
+        sample_rate, channels = _probe(path)
+    block = 2 * channels
+    proc = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le",
+         "-ar", str(sample_rate), "-ac", str(channels), "pipe:1"],
+        stdout=subprocess.PIPE)
+    eof = False
+    try:
+        while not eof:
+            raw = proc.stdout.read(chunk_frames * block)
+            eof = len(raw) < chunk_frames * block
+            frames = np.frombuffer(raw[:len(raw) // block * block], dtype=np.uint8).reshape(-1, block)
+            yield PcmBuffer(frames, sample_rate, channels, 2)
+    finally:
+        proc.stdout.close()
+        if not eof:
+            proc.kill()  # 중간에 그만 읽으면 ffmpeg 종료
+        proc.wait()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+
+def stream_slices(path, ranges, chunk_frames=STREAM_CHUNK):
+    # 스트림에서 구간을 잘라 PcmBuffer로 하나씩 내보냄
+    # ranges: 시작 순 정렬된 [(start_ms, length_ms), ...] — 같은 순서로 나옴
+    # 메모리에는 아직 안 나간 구간의 시작부터 현재 위치까지만 (look-back 창) 남김
+    sample_rate, channels = _probe(path)
+    bounds = [(max(ms_to_frame(start_ms, sample_rate), 0),
+               max(ms_to_frame(start_ms + length_ms, sample_rate), 0)) for start_ms, length_ms in ranges]
+
+    blocks = stream_blocks(path, chunk_frames, sample_rate, channels)
+    buf = np.zeros((0, 2 * channels), dtype=np.uint8)
+    buf_start = 0  # buf 첫 프레임 번호
+    pos = 0        # 지금까지 디코딩한 프레임 수
+    try:
+        for i, (start, end) in enumerate(bounds):
+            while pos < end:
+                chunk = next(blocks, None)
+                if chunk is None:
+                    break
+                # 다음에 나갈 구간 시작보다 앞은 버림
+                skip = min(max(buf_start - pos, 0), len(chunk))
+                buf = np.concatenate((buf, chunk.frames[skip:])) if len(buf) else chunk.frames[skip:]
+                pos += len(chunk)
+            lo = min(max(start - buf_start, 0), len(buf))
+            hi = min(max(end - buf_start, lo), len(buf))
+            yield PcmBuffer(buf[lo:hi].copy(), sample_rate, channels, 2)
+
+            keep_from = bounds[i + 1][0] if i + 1 < len(bounds) else pos
+            drop = keep_from - buf_start
+            if drop > 0:
+                buf = buf[min(drop, len(buf)):]
+                buf_start = keep_from
+    finally:
+        blocks.close()
+
+
+def export_stream(path, jobs, fmt="wav", batch_size=ENCODE_BATCH, backend="atrim"):
+    # export_slices 의 스트리밍 버전: jobs = [(start_ms, length_ms, path), ...]
+    # 배치 단위 구간만 스트림에서 받아서 그 안에서 잘라 내보냄
+    jobs = sorted(jobs, key=lambda j: j[0])
+    if backend == "segment" and is_lossy(fmt):
+        # 스템 파일을 ffmpeg 가 직접 읽어 한 번에 세그먼트로, 겹치는 구간만 아래 스트림으로
+        sample_rate, _ = _probe(path)
+        segments, jobs = _split_overlaps(jobs, lambda j: (ms_to_frame(j[0], sample_rate),
+                                                         ms_to_frame(j[0] + j[1], sample_rate)))
+        frame_jobs = [(ms_to_frame(start_ms, sample_rate),
+                       max(ms_to_frame(start_ms + length_ms, sample_rate), ms_to_frame(start_ms, sample_rate) + 1),
+                       out) for start_ms, length_ms, out in segments]
+        if segments and not _encode_segments(["-i", path], None, frame_jobs, fmt, sample_rate, 0):
+            jobs = sorted(jobs + segments, key=lambda j: j[0])
+    if not jobs:
+        return
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    spans = [(batch[0][0], max(start_ms + length_ms for start_ms, length_ms, _ in batch) - batch[0][0])
+             for batch in batches]
+    for batch, span in zip(batches, stream_slices(path, spans)):
+        sr = span.sample_rate
+        base = max(ms_to_frame(batch[0][0], sr), 0)
+        export_slices(span, [(ms_to_frame(start_ms, sr) - base, ms_to_frame(start_ms + length_ms, sr) - base, out)
+                             for start_ms, length_ms, out in batch], fmt, batch_size)
+
+
+def write_wav(path, frames, sample_rate, channels, sample_width):
+    # frames(view)를 그대로 파일에 기록 — 중간 복사 없음
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(sample_rate)
+        w.writeframes(as_bytes(frames))
+
+
+def _encode_batch(pcm, jobs, fmt):
+    # 슬라이스 여러 개를 ffmpeg 한 번으로 인코딩
+    # 배치가 걸친 구간만 stdin으로 넘기고 atrim으로 출력마다 잘라냄
+    span_start = min(start for start, _, _ in jobs)
+    span_end = max(end for _, end, _ in jobs)
+
+    n = len(jobs)
+    graph = [f"[0:a]asplit={n}" + "".join(f"[s{i}]" for i in range(n))]
+    for i, (start, end, _) in enumerate(jobs):
+        graph.append(f"[s{i}]atrim=start_sample={start - span_start}:end_sample={end - span_start},"
+                     f"asetpts=PTS-STARTPTS[o{i}]")
+
+    cmd = ["ffmpeg", "-v", "error", "-y",
+           "-f", RAW_FORMATS[pcm.sample_width], "-ar", str(pcm.sample_rate),
+           "-ac", str(pcm.channels), "-i", "pipe:0",
+           "-filter_complex", ";".join(graph)]
+    for i, (_, _, path) in enumerate(jobs):
+        cmd += ["-map", f"[o{i}]", "-c:a", LOSSY_CODECS[fmt], path]
+
+    subprocess.run(cmd, input=as_bytes(pcm.slice(span_start, span_end)), check=True)
+
+
+def _split_overlaps(jobs, bounds):
+    # 시작 순 jobs → (앞 구간과 겹치지 않아 이어서 자를 수 있는 것, 겹쳐서 따로 잘라야 하는 것)
+    # bounds(job) = (시작 프레임, 끝 프레임)
+    segments = []
+    rest = []
+    last_end = None
+    for job in jobs:
+        start, end = bounds(job)
+        if last_end is None or start >= last_end:
+            segments.append(job)
+            last_end = max(end, start + 1)
+        else:
+            rest.append(job)
+    return segments, rest
+
+
+def _encode_segments(input_args, data, jobs, fmt, sample_rate, origin):
+    # 겹치지 않는 시작 순 구간들을 ffmpeg segment muxer 한 번으로 인코딩 (-segment_times)
+    # 구간 사이 빈 곳도 세그먼트가 되므로 버리고, 나머지는 출력 경로로 이름만 바꿈
+    # 경계는 인코더 패킷 단위로 맞춰짐 (mp3 1152샘플) → 세그먼트 목록의 시작/끝이 예상 경계와
+    # 한 패킷 넘게 어긋나면 (짧은 세그먼트가 합쳐지거나 빠짐 — 뒤 이름이 전부 밀림) False
+    # origin: 입력 첫 프레임의 스템 내 번호
+    segments = []  # (세그먼트 시작 프레임, 출력 경로 또는 None = 빈 곳)
+    pos = origin
+    for start, end, path in jobs:
+        if start > pos:
+            segments.append((pos, None))
+        segments.append((start, path))
+        pos = end
+    segments.append((pos, None))  # 마지막 구간 뒤 (입력이 거기서 끝나면 안 생김)
+    starts = [start for start, _ in segments]
+    outputs = [path for _, path in segments]
+
+    out_dir = os.path.dirname(jobs[0][2]) or "."
+    tmp_dir = tempfile.mkdtemp(prefix=".segments-", dir=out_dir)
+    try:
+        list_path = os.path.join(tmp_dir, "segments.csv")
+        cmd = ["ffmpeg", "-v", "error", "-y", *input_args, "-c:a", LOSSY_CODECS[fmt],
+               "-f", "segment", "-segment_format", fmt,
+               "-segment_times", ",".join(f"{(t - origin) / sample_rate:.6f}" for t in starts[1:]),
+               "-reset_timestamps", "1", "-segment_list", list_path, "-segment_list_type", "csv",
+               os.path.join(tmp_dir, f"%d.{fmt}")]
+        subprocess.run(cmd, input=data, check=True)
+
+        with open(list_path, "r", encoding="utf-8") as f:
+            made = [line.strip().split(",") for line in f if line.strip()]  # 파일, 시작 초, 끝 초
+        if len(made) not in (len(outputs), len(outputs) - 1):
+            return False
+        tolerance = PACKET_FRAMES[fmt] / sample_rate
+        for i, (_, start, end) in enumerate(made):
+            # 마지막 빈 곳은 입력 끝까지라 끝 시각은 확인하지 않음
+            if abs(float(start) - (starts[i] - origin) / sample_rate) > tolerance:
+                return False
+            if i + 1 < len(starts) and abs(float(end) - (starts[i + 1] - origin) / sample_rate) > tolerance:
+                return False
+        for (name, _, _), path in zip(made, outputs):
+            if path is not None:
+                os.replace(os.path.join(tmp_dir, name), path)
+        return True
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def export_slices(pcm, jobs, fmt="wav", batch_size=ENCODE_BATCH, backend="atrim"):
+    # jobs: [(start_frame, end_frame, path), ...]
+    # backend (mp3/ogg): atrim = 배치마다 ffmpeg 1회, 샘플 단위 정확
+    #                    segment = 겹치지 않는 구간 전부 ffmpeg 1회, 경계는 패킷 단위 (겹치는 구간만 atrim)
+    jobs = [(start, max(end, start + 1), path) for start, end, path in jobs]
+    if not is_lossy(fmt):
+        for start, end, path in jobs:
+            write_wav(path, pcm.slice(start, end), pcm.sample_rate, pcm.channels, pcm.sample_width)
+        return
+
+    jobs.sort(key=lambda j: j[0])
+    if backend == "segment":
+        segments, jobs = _split_overlaps(jobs, lambda j: j[:2])
+        if segments:
+            start, end = segments[0][0], segments[-1][1]
+            raw_input = ["-f", RAW_FORMATS[pcm.sample_width], "-ar", str(pcm.sample_rate),
+                         "-ac", str(pcm.channels), "-i", "pipe:0"]
+            if not _encode_segments(raw_input, as_bytes(pcm.slice(start, end)), segments, fmt,
+                                    pcm.sample_rate, start):
+                jobs = sorted(jobs + segments, key=lambda j: j[0])
+    for i in range(0, len(jobs), batch_size):
+        _encode_batch(pcm, jobs[i:i + batch_size], fmt)
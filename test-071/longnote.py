@@ -0,0 +1,43 @@
+import numpy as np
+
+# 롱노트 = 머리/꼬리 이벤트 두 개 (길이와 무관하게 노트당 O(1))
+# lntype1: 레인 1x/2x → 롱노트 채널 5x/6x 에 머리, 꼬리 (#LNTYPE 1)
+# lnobj:   일반 레인에 머리 + #LNOBJ 번호로 꼬리 (test-051/052 의 시작/끝 두 노트 방식을 표준으로)
+
+PLAYABLE = {f"{side}{lane}" for side in (1, 2) for lane in range(1, 10)}
+
+
+def is_playable(channel):
+    return channel in PLAYABLE
+
+
+def ln_channel(lane):
+    # 11~19 → 51~59, 21~29 → 61~69
+    return f"{int(lane[0]) + 4}{lane[1]}"
+
+
+def ln_tails(heads, note_ends, gap=1):
+    # 꼬리 = 노트 끝, 단 같은 레인 다음 노트 머리와 겹치지 않게 gap tick 앞까지
+    heads = np.asarray(heads, dtype=np.int64)
+    next_heads = np.append(heads[1:], np.iinfo(np.int64).max)
+    return np.maximum(np.minimum(np.asarray(note_ends, dtype=np.int64), next_heads - gap), heads)
+
+
+def lane_events(lane, ticks, ids, ln_heads, ln_tails, ln_ids, mode="lntype1", lnobj_id=None):
+    # 한 레인의 단노트 + 롱노트 → [(채널, 정렬된 tick 배열, 번호 배열)]
+    ticks = np.asarray(ticks, dtype=np.int64)
+    ids = np.asarray(ids, dtype=np.int64)
+    ln_ids = np.asarray(ln_ids, dtype=np.int64)
+    ln_ticks = np.column_stack((ln_heads, ln_tails)).astype(np.int64).ravel()
+    if mode == "lnobj":
+        tails = np.full(len(ln_ids), lnobj_id, dtype=np.int64)
+        ln_values = np.column_stack((ln_ids, tails)).ravel()
+        all_ticks = np.concatenate((ticks, ln_ticks))
+        order = np.argsort(all_ticks, kind="stable")
+        return [(lane, all_ticks[order], np.concatenate((ids, ln_values))[order])]
+
+    result = [(lane, ticks, ids)]
+    if len(ln_ids):
+        order = np.argsort(ln_ticks, kind="stable")
+        result.append((ln_channel(lane), ln_ticks[order], np.repeat(ln_ids, 2)[order]))
+    return result
@@ -0,0 +1,385 @@
+from mido import MidiFile
+from export_pool import ExportJob, export_keysounds
+from tempo_map import TempoMap
+from note_table import NoteTable
+from onset import onset_table
+from silence import stem_envelope, trim_silence
+from keysound import PcmBuffer, load_pcm, export_slices
+from bake import bake_stem
+from dedup import KeysoundIndex
+from bms_append import BmsAppender
+from chart import MAX_MEASURE, Chart, cell_ticks, grid_cells, measure_of
+from bms_writer import tick_events, merge_events, write_bms
+from split import split_notes
+from wav_ids import MAX_ID, assign_slots, choose_base, parse_id, rebase_id, to_id
+from longnote import is_playable, lane_events, ln_tails
+from functools import partial
+import numpy as np
+import os
+import tempfile
+
+# === 설정 ===
+midi_files = ["pn1.mid", "pn2.mid", "pn3.mid",
+              "pn4.mid", "pn5.mid", "kick.mid", "snare.mid"]
+wav_files = ["pn1.wav", "pn2.wav", "pn3.wav",
+             "pn4.wav", "pn5.wav", "kick.wav", "snare.wav"]
+instrument_names = ["pn1", "pn2", "pn3", "pn4", "pn5", "kick", "snare"]
+output_dir = "notes"
+bms_path = "output.bms"
+bpm_default = 96
+division = None     # None = tick 기준 정확한 배치 (줄마다 최소 분할 자동), 숫자 = 그 분할로 양자화
+base_lane = 11      # 첫 악기 레인 번호
+min_note_ms = 50    # 최소 노트 길이
+longnote_threshold_ms = None  # 이 길이 이상이면 롱노트 처리 (None = 모두 단노트)
+longnote_mode = "lntype1"     # lntype1 (채널 51~59, 머리/꼬리) / lnobj (#LNOBJ 번호로 꼬리)
+export_format = "mp3"  # wav / mp3 / ogg
+export_workers = os.cpu_count()  # 키음 내보내기 프로세스 수 (1 = 순차)
+lossy_backend = "atrim"  # mp3/ogg: atrim (64개씩 ffmpeg 1회, 샘플 단위) / segment (스템당 ffmpeg 1회, 경계는 패킷 단위)
+pcm_cache_dir = ".pcm_cache"  # mp3/ogg/flac 스템 디코딩 결과 캐시 (None = 빌드마다 임시 폴더에 디코딩, 끝나면 삭제)
+dedup_mode = "exact"  # exact (PCM 해시) / fuzzy (엔벨로프+스펙트럼 허용 오차) / None
+silence_db = -60    # 이보다 조용한 노트 구간은 키음을 만들지 않음 (판정 레인 노트는 무음 키음으로 남김), 뒤쪽 무음도 잘라냄 (None = 끔)
+onset_fallback = True  # MIDI 없이 WAV만 있으면 onset 검출로 노트 생성 (test-001)
+split_mode = None   # None / "pitch" / "layer" — 스템을 파티션으로 나눠 레인마다 배치
+wav_base = None     # None = 자동 (WAV 1295개 넘으면 #BASE 62) / 36 / 62
+channel_remap = None  # 채널 재배치 표, 예: after.py 의 LANES_TO_BGM (키음 끄기, import 해서 지정) / {"11": "12", "12": "11"} (레인 교환)
+bake_bgm = False    # BGM(01)으로 가는 노트를 스템마다 긴 WAV 하나로 미리 믹스 (#000 01 에 한 번만 배치)
+
+# batch.py 곡별 manifest(song.json)로 바꿀 수 있는 설정
+SETTINGS = ("midi_files", "wav_files", "instrument_names", "output_dir", "bms_path",
+            "bpm_default", "division", "base_lane", "min_note_ms", "longnote_threshold_ms",
+            "longnote_mode", "export_format", "lossy_backend",
+            "export_workers", "pcm_cache_dir", "dedup_mode", "silence_db", "onset_fallback", "split_mode", "wav_base",
+            "channel_remap", "bake_bgm")
+
+# WAV 번호: 2자리 36진수, 1295개를 넘으면 #BASE 62 (wav_ids.py)
+
+
+def main(**settings):
+    # 인자로 준 설정은 위 기본값을 덮어씀 (현재 폴더 기준 경로)
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"알 수 없는 설정: {', '.join(sorted(unknown))}")
+    globals().update(settings)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # 캐시를 꺼도 압축 스템은 이번 빌드용 임시 캐시에 ffmpeg 1회로 디코딩 —
+    # 엔벨로프, 중복 제거 해시(파티션마다), 내보내기 워커가 모두 같은 memmap을 읽음
+    build_cache = None if pcm_cache_dir else tempfile.TemporaryDirectory(prefix="pcm-build-")
+    cache_dir = pcm_cache_dir or build_cache.name
+
+    # --- MIDI 로드 (모든 MIDI의 set_tempo를 합친 템포 맵 하나를 곡 템포로 사용) ---
+    sources = []
+    for midi_path, wav_path, inst_name in zip(midi_files, wav_files, instrument_names):
+        if not os.path.exists(wav_path):
+            mid = None
+        elif midi_path and os.path.exists(midi_path):
+            mid = MidiFile(midi_path)
+        elif onset_fallback:
+            mid = MidiFile(ticks_per_beat=480)  # 트랙 없는 MIDI = 기본 BPM, 노트는 onset 검출로
+        else:
+            mid = None
+        sources.append((midi_path, wav_path, inst_name, mid))
+    mids = [mid for *_, mid in sources if mid is not None]
+    song_tempo = TempoMap(mids, bpm_default) if mids else None
+    # 스템 자르기도 같은 템포 맵 (MIDI 해상도가 다르면 그 해상도로 tick만 맞춤)
+    tempo_maps = {song_tempo.ticks_per_beat: song_tempo} if song_tempo else {}
+    initial_bpm = song_tempo.initial_bpm if song_tempo is not None else bpm_default
+
+    # --- 기존 BMS 색인 (사이드카가 최신이면 파일을 다시 읽지 않음) ---
+    # 새로 만드는 경우엔 마지막에 스트리밍으로 한 번에 기록
+    bms = BmsAppender(bms_path) if os.path.exists(bms_path) else None
+    wav_files_in_bms = dict(bms.wav_files) if bms else {}  # 파일 경로 -> WAV 번호
+    next_wav_index = bms.next_wav_id if bms else 1  # WAV00은 BMS에서 빈 칸이므로 01부터
+
+    # --- 1단계: 스템(또는 파티션)별 노트/WAV 번호 계획 (순차 → 번호 결정적) ---
+    # parts: (inst_name, wav_path, tempo, NoteTable, 레인, 노트 끝까지 자를지)
+    parts = []
+    for idx, (midi_path, wav_path, inst_name, mid) in enumerate(sources):
+        if mid is None:
+            continue
+        if mid.ticks_per_beat not in tempo_maps:
+            tempo_maps[mid.ticks_per_beat] = TempoMap(mids, bpm_default, mid.ticks_per_beat)
+        tempo = tempo_maps[mid.ticks_per_beat]
+        if mid.tracks:
+            table = NoteTable.from_midi(mid)  # 열 단위 NoteTable
+        else:
+            table = onset_table(load_pcm(wav_path, cache_dir), bpm_default, tempo=tempo)
+        if not split_mode:
+            parts.append((inst_name, wav_path, tempo, table, f"{base_lane + idx:02}", False))
+            continue
+        # 음높이/layer 파티션을 .mid로 쓰지 않고 바로 레인에 배치 (레인이 모자라면 BGM)
+        for part in split_notes(table, split_mode):
+            lane = base_lane + len(parts)
+            parts.append((inst_name, wav_path, tempo, part.notes(),
+                          f"{lane:02}" if lane <= 19 else "01", True))
+
+    index = KeysoundIndex(output_dir, dedup_mode) if dedup_mode else None
+    stems = []  # (lane_channel, tempo, new_wavs, event_list, ln_list)
+    remap = channel_remap or {}
+    jobs = []
+    pcm_cache = {}  # 해시 계산용, 스템당 디코딩 1회
+    envelopes = {}  # 무음 판정용 스템 엔벨로프
+    silent_count = 0
+    silence_file = f"silence.{export_format}"  # 판정 레인 무음 노트가 쓰는 공용 키음 (1프레임 무음)
+    silence_rate = None  # 무음 키음을 쓴 스템의 샘플레이트 (None = 안 씀)
+    trimmed_ms = 0
+    usage = {}  # WAV 번호 -> [처음 시작 ms, 마지막 끝 ms]
+    bakes = {}  # (inst_name, wav_path) -> (tempo, BGM 노트 구간들) — 노트별 키음 대신 미리 믹스
+    for inst_name, wav_path, tempo, table, lane_channel, until_note_end in parts:
+        baked = bake_bgm and remap.get(lane_channel, lane_channel) == "01"
+        if index and not baked and wav_path not in pcm_cache:
+            pcm_cache.clear()
+            pcm_cache[wav_path] = load_pcm(wav_path, cache_dir)
+
+        # 화음은 하나로 합친 시작 tick, 끝 = 다음 시작 (파티션이면 노트 끝)
+        notes, first = np.unique(table.start_tick, return_index=True)
+        note_ends = np.maximum.reduceat(table.end_tick, first) if len(first) else notes
+        if until_note_end:
+            ends = note_ends
+        else:
+            ends = np.append(notes[1:], max(table.length_ticks, notes[-1] if len(notes) else 0))
+        # 템포 맵으로 전체 tick → 초 한 번에 변환
+        starts_sec = tempo.ticks_to_seconds(notes)
+        ends_sec = tempo.ticks_to_seconds(ends)
+
+        # --- 오디오 구간 및 내용 기반 중복 제거 ---
+        new_wavs = []  # (WAV 번호, BMS 경로) — 이번에 #WAV 등록할 것
+        event_list = []
+        ln_list = []  # (머리 tick, 꼬리 tick, WAV 번호)
+
+        # ms는 소수 그대로 → 자를 때 프레임으로 반올림 (차트 배치와 같은 시각, 앞뒤 구간 사이 틈/겹침 없음)
+        starts_ms = starts_sec*1000
+        lengths_ms = np.maximum((ends_sec - starts_sec)*1000, min_note_ms)
+        silent = np.zeros(len(notes), dtype=bool)
+        if silence_db is not None:
+            # 무음 노트는 키음으로 내보내지 않음, 뒤쪽 무음은 잘라서 내보냄
+            # 판정 레인은 노트를 남기고 공용 무음 키음으로 (치는 노트가 사라지지 않게), BGM 레인은 노트째 뺌
+            if wav_path not in envelopes:
+                envelopes.clear()
+                envelopes[wav_path] = stem_envelope(wav_path, cache_dir)
+            keep, trimmed = trim_silence(envelopes[wav_path], starts_ms, lengths_ms, silence_db, min_note_ms)
+            silent_count += int((~keep).sum())
+            trimmed_ms += float((lengths_ms - trimmed)[keep].sum())
+            if is_playable(remap.get(lane_channel, lane_channel)):
+                silent, keep = ~keep, np.ones(len(notes), dtype=bool)
+                if silent.any():
+                    silence_rate = envelopes[wav_path].sample_rate
+            notes, starts_ms, lengths_ms = notes[keep], starts_ms[keep], trimmed[keep]
+            note_ends, silent = note_ends[keep], silent[keep]
+        # 롱노트: 실제 노트 길이가 기준 이상 (BGM으로 가는 레인은 제외)
+        if division:
+            # 머리/꼬리를 먼저 격자에 맞춘 뒤 꼬리는 다음 머리보다 한 칸 앞까지
+            # (반올림 후 다음 머리와 같은 칸이 되면 머리/꼬리 중 하나가 사라짐) — 한 칸도 안 남으면 단노트
+            heads = grid_cells(notes, tempo.ticks_per_measure, division)
+            tail_cells = ln_tails(heads, grid_cells(note_ends, tempo.ticks_per_measure, division))
+            tails = cell_ticks(tail_cells, tempo.ticks_per_measure, division)
+            has_tail = tail_cells > heads
+        else:
+            tails = ln_tails(notes, note_ends, table.ticks_per_beat // 16)  # 다음 노트와 64분음표 간격
+            has_tail = tails > notes
+        if longnote_threshold_ms is not None and is_playable(remap.get(lane_channel, lane_channel)):
+            is_long = has_tail & ((tempo.ticks_to_seconds(tails) - tempo.ticks_to_seconds(notes))*1000
+                                  >= longnote_threshold_ms)
+        else:
+            is_long = np.zeros(len(notes), dtype=bool)
+        ranges = list(zip(starts_ms.tolist(), lengths_ms.tolist()))
+        sounding = [r for r, quiet in zip(ranges, silent.tolist()) if not quiet]
+        if baked:
+            # 판정 없는 소리는 노트마다 자르지 않고 원래 시각에 겹쳐 더한 스템 하나로
+            bakes.setdefault((inst_name, wav_path), (tempo, []))[1].extend(ranges)
+            continue
+        if index:
+            audio = pcm_cache[wav_path]
+            pieces = (PcmBuffer(audio.slice_ms(start_ms, length_ms), audio.sample_rate,
+                                audio.channels, audio.sample_width) for start_ms, length_ms in sounding)
+        else:
+            pieces = (None for _ in sounding)
+
+        for tick, tail, long, quiet, (start_ms, length_ms) in zip(notes.tolist(), tails.tolist(), is_long.tolist(),
+                                                                  silent.tolist(), ranges):
+            if quiet:
+                filename = silence_file
+                key = None
+            else:
+                piece = next(pieces)
+                key = index.key(piece, piece.frames, export_format) if index else None
+                filename = index.lookup(key) if index else None
+            if filename is None:
+                # 처음 나온 소리 → 새 파일로 내보내기
+                filename = f"{inst_name}-{next_wav_index}.{export_format}"
+                # 다시 빌드할 때 예전 빌드가 남긴 (재사용 중일 수 있는) 파일은 덮어쓰지 않음
+                n = 0
+                while index and filename in index.keys_by_file:
+                    n += 1
+                    filename = f"{inst_name}-{next_wav_index}_{n}.{export_format}"
+                jobs.append(ExportJob(wav_path, start_ms, length_ms, next_wav_index,
+                                      os.path.join(output_dir, filename)))
+                if index:
+                    index.add(key, filename)
+
+            bms_file = f"{os.path.basename(output_dir)}/{filename}"
+            if bms_file not in wav_files_in_bms:
+                wav_files_in_bms[bms_file] = next_wav_index
+                new_wavs.append((next_wav_index, bms_file))
+                next_wav_index += 1
+
+            wav_id = wav_files_in_bms[bms_file]
+            if long:
+                ln_list.append((tick, tail, wav_id))
+            else:
+                event_list.append((tick, wav_id))
+            window = usage.setdefault(wav_id, [start_ms, start_ms + length_ms])
+            window[0] = min(window[0], start_ms)
+            window[1] = max(window[1], start_ms + length_ms)
+
+        stems.append((lane_channel, tempo, new_wavs, event_list, ln_list))
+
+    for (inst_name, wav_path), (tempo, ranges) in bakes.items():
+        if not ranges:
+            continue
+        # 베이크 스템은 0초부터 시작 → #000 마디 첫 칸에 BGM 한 번
+        filename = f"{inst_name}-bgm.{export_format}"
+        bms_file = f"{os.path.basename(output_dir)}/{filename}"
+        new_wavs = []
+        if bms_file not in wav_files_in_bms:
+            wav_files_in_bms[bms_file] = next_wav_index
+            new_wavs.append((next_wav_index, bms_file))
+            next_wav_index += 1
+        wav_id = wav_files_in_bms[bms_file]
+        usage[wav_id] = [0, max(start_ms + length_ms for start_ms, length_ms in ranges)]
+        stems.append(("01", tempo, new_wavs, [(0, wav_id)], []))
+    if bakes:
+        print(f"🎛️ BGM 베이크: 노트 {sum(len(r) for _, r in bakes.values())}개 → 스템 {len(bakes)}개")
+
+    if silence_db is not None:
+        print(f"🔇 무음 노트 {silent_count}개 키음 없이 (판정 레인은 {silence_file} 로 남김), "
+              f"뒤쪽 무음 {trimmed_ms / 1000:.1f}초 잘라냄")
+
+    # --- WAV 번호 진법: 1295개를 넘으면 #BASE 62 (최대 3843개) ---
+    max_id = next_wav_index - 1
+    lnobj_header = next((h for h in bms.index["headers"] if h.startswith("#LNOBJ ")), None) if bms else None
+    use_lnobj = longnote_mode == "lnobj" and any(ln_list for *_, ln_list in stems)
+    # #LNOBJ 는 새로 정할 때 진법의 마지막 번호 (ZZ / zz) → WAV 번호와 겹치지 않게 한 칸 비움
+    reserve = 1 if use_lnobj and lnobj_header is None else 0
+    base = 62 if bms and bms.base == 62 else (wav_base or choose_base(max_id + reserve))
+    # #LNOBJ 번호는 WAV로 쓰지 않음 (기존 차트의 #LNOBJ 는 진법이 바뀌면 62진수로 다시 읽은 번호)
+    lnobj_id = parse_id(lnobj_header[7:9], base) if lnobj_header else (MAX_ID[base] if use_lnobj else None)
+    # 진법이 바뀌면 기존 #WAV 이름은 그대로 (62진수로 다시 읽은 번호), 새 번호는 그 뒤부터
+    first_new = bms.next_wav_id if bms else 1
+    rebased = bms is not None and bms.base != base
+    shift = max((rebase_id(i, bms.base, base) for i in bms.wav_files.values()), default=0) + 1 - first_new \
+        if rebased else 0
+
+    def renumber(i):
+        if i < first_new:
+            return rebase_id(i, bms.base, base) if rebased else i
+        i += shift
+        return i + 1 if lnobj_id is not None and i >= lnobj_id else i
+
+    if shift or (lnobj_id is not None and lnobj_id <= max_id):
+        stems = [(lane_channel, tempo, [(renumber(i), f) for i, f in new_wavs],
+                  [(tick, renumber(i)) for tick, i in event_list],
+                  [(head, tail, renumber(i)) for head, tail, i in ln_list])
+                 for lane_channel, tempo, new_wavs, event_list, ln_list in stems]
+        max_id = renumber(max_id) if max_id >= first_new else max_id + shift
+    # 키음별 사용 구간을 색칠 → 동시에 필요한 최대 키음 수 (#WAV는 곡 전체에 고정이라 보고용)
+    windows = np.array(list(usage.values()), dtype=np.int64).reshape(-1, 2)
+    _, n_slots = assign_slots(windows[:, 0], windows[:, 1])
+    print(f"🎚️ 키음 {len(usage)}개 사용, 동시에 울리는 최대 {n_slots}개 (#BASE {base})")
+    if max_id > MAX_ID[base]:
+        raise ValueError(f"WAV 번호 {max_id}개: #BASE {base} 최대 {MAX_ID[base]}개를 넘음 "
+                         f"(동시 최대 {n_slots}개 — 곡을 나누거나 dedup_mode=\"fuzzy\" 로 줄이기)")
+    id_of = partial(to_id, base=base)
+    # 마디 번호는 3자리 → 마지막 마디가 넘으면 내보내기 전에 중단 (BMS로 쓸 수 없는 줄)
+    last_measures = [int(measure_of(song_tempo.ticks[-1], song_tempo.ticks_per_measure, division))
+                     ] if song_tempo else []
+    for _, tempo, _, event_list, ln_list in stems:
+        last_tick = max([tick for tick, _ in event_list] + [tail for _, tail, _ in ln_list], default=None)
+        if last_tick is not None:
+            last_measures.append(int(measure_of(last_tick, tempo.ticks_per_measure, division)))
+    if max(last_measures, default=0) > MAX_MEASURE:
+        raise ValueError(f"마지막 노트가 #{max(last_measures)} 마디: BMS 마디 번호는 최대 {MAX_MEASURE} "
+                         f"(곡을 나누어 빌드)")
+
+    def stem_lanes(lane_channel, event_list, ln_list):
+        # 단노트 + 롱노트 → [(채널, tick 배열, 번호 배열)]
+        # 레인을 먼저 재배치 → 롱노트 채널(5x/6x)도 옮긴 레인을 따라감
+        ticks, ids = np.array(event_list, dtype=np.int64).reshape(-1, 2).T
+        heads, tails, ln_ids = np.array(ln_list, dtype=np.int64).reshape(-1, 3).T
+        return lane_events(remap.get(lane_channel, lane_channel), ticks, ids, heads, tails, ln_ids,
+                           longnote_mode, lnobj_id)
+
+    # --- 2단계: 전 스템 키음을 프로세스 풀에서 병렬 내보내기 ---
+    exported = export_keysounds(jobs, export_format, export_workers, cache_dir, lossy_backend)
+    print(f"🎧 키음 {exported}개 내보내기 완료 (워커 {export_workers}개)")
+    for (inst_name, wav_path), (_, ranges) in bakes.items():
+        if ranges:
+            baked_pcm = bake_stem(load_pcm(wav_path, cache_dir), ranges)
+            export_slices(baked_pcm, [(0, len(baked_pcm), os.path.join(output_dir, f"{inst_name}-bgm.{export_format}"))],
+                          export_format)
+    if silence_rate is not None:
+        export_slices(PcmBuffer(np.zeros((1, 4), dtype=np.uint8), silence_rate, 2, 2),
+                      [(0, 1, os.path.join(output_dir, silence_file))], export_format)
+    if index:
+        index.save()
+    if build_cache:
+        build_cache.cleanup()
+
+    # --- 3단계: 새 WAV 등록 + 마디 배치 (이번 실행분만) ---
+    header_lines = [f"#WAV{id_of(idxnum)} {bms_file}"
+                    for _, _, new_wavs, _, _ in stems for idxnum, bms_file in new_wavs]
+    bpm_header, bpm_events = song_tempo.bms_tempo_events(id_of) if song_tempo else ([], [])
+    header_lines += [line for line in bpm_header if not (bms and bms.has_header(line))]
+    if base == 62 and not (bms and bms.base == 62):
+        header_lines.insert(0, "#BASE 62")
+    if use_lnobj and lnobj_header is None:
+        header_lines.append(f"#LNOBJ {id_of(lnobj_id)}")
+    if bms and any(ln_list for *_, ln_list in stems) and not bms.has_header("#LNTYPE 1"):
+        header_lines.append("#LNTYPE 1")  # 기존 차트에 롱노트를 처음 넣으면 #LNTYPE 0 을 바꾸거나 추가
+
+    if bms is None:
+        # 새 BMS: 스템별 시간순 이벤트를 합쳐 마디가 끝날 때마다 바로 기록
+        streams = []
+        for channel in ("03", "08"):
+            ticks = [tick for tick, c, _ in bpm_events if c == channel]
+            values = [value for _, c, value in bpm_events if c == channel]
+            if ticks:
+                streams.append(tick_events(channel, ticks, values, song_tempo.ticks_per_measure, division))
+        for lane_channel, tempo, _, event_list, ln_list in stems:
+            for channel, ticks, ids in stem_lanes(lane_channel, event_list, ln_list):
+                streams.append(tick_events(channel, ticks, ids, tempo.ticks_per_measure, division))
+
+        header = [
+            "*---------------------- HEADER FIELD",
+            "#PLAYER 1",
+            "#GENRE AUTO_MERGE",
+            "#TITLE COMBINED MIDI",
+            "#ARTIST AI",
+            f"#BPM {initial_bpm:g}",
+            "#PLAYLEVEL 1",
+            "#RANK 2",
+            f"#LNTYPE {0 if longnote_threshold_ms is None else 1}",
+        ]
+        collisions = []
+        write_bms(bms_path, header + header_lines, merge_events(*streams), id_of, collisions)
+    else:
+        # 기존 BMS: 새 줄만 모아서 사이드카 색인으로 끼워 넣음
+        chart = Chart()
+        for lane_channel, tempo, _, event_list, ln_list in stems:
+            for channel, ticks, ids in stem_lanes(lane_channel, event_list, ln_list):
+                chart.add_ticks(channel, ticks, tempo.ticks_per_measure, ids, division)
+        for tick, channel, value in bpm_events:
+            chart.add_ticks(channel, tick, song_tempo.ticks_per_measure, value, division)
+        bms.append(header_lines, chart.lines(id_of))
+        collisions = chart.collisions
+
+    # 같은 레인/같은 칸에 겹친 노트 (나중 노트만 남음)
+    for channel, measure, cell, resolution, values in collisions:
+        print(f"⚠️ 충돌: #{measure:03}{channel} {cell}/{resolution} → {', '.join(id_of(v) for v in values)}")
+
+    notes_kind = "단노트" if longnote_threshold_ms is None else f"롱노트 {longnote_mode}"
+    print(f"🎵 모든 MIDI 병합 완료 (악기별 레인, {notes_kind}, notes/*.{export_format}, {base}진수 WAV 번호)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from collections import deque
+
+import numpy as np
+
+COLUMNS = ("start_tick", "end_tick", "pitch", "velocity", "channel", "track")
+
+
+class NoteTable:
+    # MIDI 노트를 열(column) 단위 NumPy 배열로 보관
+    # 슬라이싱 / 중복 제거 / 레인 배치 / BMS 배치는 모두 이 표를 읽음
+    def __init__(self, start_tick, end_tick, pitch, velocity, channel, track,
+                 ticks_per_beat=480, length_ticks=0):
+        self.start_tick = np.asarray(start_tick, dtype=np.int64)
+        self.end_tick = np.asarray(end_tick, dtype=np.int64)
+        self.pitch = np.asarray(pitch, dtype=np.int16)
+        self.velocity = np.asarray(velocity, dtype=np.int16)
+        self.channel = np.asarray(channel, dtype=np.int16)
+        self.track = np.asarray(track, dtype=np.int16)
+        self.ticks_per_beat = ticks_per_beat
+        self.length_ticks = max(int(length_ticks), int(self.end_tick.max(initial=0)))
+
+    @classmethod
+    def from_midi(cls, mid, pairing="stack"):
+        # pairing: "stack" = 같은 음 겹치면 마지막 note_on과 짝 (LIFO)
+        #          "queue" = 먼저 켜진 note_on과 짝 (FIFO, test-016 방식을 deque로)
+        fifo = pairing == "queue"
+        cols = {name: [] for name in COLUMNS}
+        length_ticks = 0
+
+        for track_idx, track in enumerate(mid.tracks):
+            tick = 0
+            stacks = {}  # (channel, pitch) -> deque[(start_tick, velocity), ...]
+            for msg in track:
+                tick += msg.time
+                kind = msg.type
+                if kind == "note_on" and msg.velocity > 0:
+                    key = (msg.channel, msg.note)
+                    if key not in stacks:
+                        stacks[key] = deque()
+                    stacks[key].append((tick, msg.velocity))
+                elif kind == "note_off" or kind == "note_on":
+                    stack = stacks.get((msg.channel, msg.note))
+                    if stack:
+                        start, velocity = stack.popleft() if fifo else stack.pop()
+                        cols["start_tick"].append(start)
+                        cols["end_tick"].append(tick)
+                        cols["pitch"].append(msg.note)
+                        cols["velocity"].append(velocity)
+                        cols["channel"].append(msg.channel)
+                        cols["track"].append(track_idx)
+
+            # note_off 없이 끝난 노트는 트랙 끝에서 닫음
+            for (channel, pitch), stack in stacks.items():
+                for start, velocity in stack:
+                    cols["start_tick"].append(start)
+                    cols["end_tick"].append(tick)
+                    cols["pitch"].append(pitch)
+                    cols["velocity"].append(velocity)
+                    cols["channel"].append(channel)
+                    cols["track"].append(track_idx)
+            length_ticks = max(length_ticks, tick)
+
+        table = cls(*(cols[name] for name in COLUMNS),
+                    ticks_per_beat=mid.ticks_per_beat, length_ticks=length_ticks)
+        return table.take(np.lexsort((table.pitch, table.start_tick)))
+
+    def __len__(self):
+        return len(self.start_tick)
+
+    def take(self, index):
+        # index: 정수 배열 또는 bool 마스크
+        return NoteTable(*(getattr(self, name)[index] for name in COLUMNS),
+                         ticks_per_beat=self.ticks_per_beat, length_ticks=self.length_ticks)
+
+    def onsets(self):
+        # 화음은 하나로 합친 정렬된 시작 tick
+        return np.unique(self.start_tick)
@@ -0,0 +1,126 @@
+import sys
+
+import numpy as np
+
+from keysound import frames_to_float, load_pcm
+from note_table import NoteTable
+
+# MIDI 없이 오디오만 있을 때 (test-001 song.wav) 노트 경계를 소리에서 찾음
+# STFT 스펙트럼 플럭스 → 적응형 임계값 + 극대값으로 onset 검출
+# 스템을 블록 단위로 읽으므로 memmap 스템이면 메모리는 블록 크기만큼
+
+FRAME_SIZE = 2048
+HOP = 512
+BLOCK_HOPS = 4096  # 블록 하나 = 4096 hop (44.1kHz 기준 약 47초)
+
+
+def spectral_flux(pcm, frame_size=FRAME_SIZE, hop=HOP, block_hops=BLOCK_HOPS):
+    # 반환: (hop별 플럭스, hop별 가장 센 주파수 bin — 포물선 보간한 소수)
+    # hop h 의 창은 h*hop 을 가운데로 (앞뒤 frame_size/2 는 무음으로 채움) → onset 시각 = h*hop
+    # 첫 hop 은 바닥 스펙트럼과 비교하므로 0초에 시작하는 소리도 onset
+    half = frame_size // 2
+    n_hops = len(pcm) // hop + 1 if len(pcm) else 0
+    window = np.hanning(frame_size).astype(np.float32)
+    flux = np.zeros(n_hops, dtype=np.float32)
+    peak_bin = np.zeros(n_hops, dtype=np.float32)
+    prev = None  # 이전 블록 마지막 스펙트럼 (블록 경계에서도 이어지게)
+
+    for h0 in range(0, n_hops, block_hops):
+        h1 = min(h0 + block_hops, n_hops)
+        lo, hi = h0 * hop - half, (h1 - 1) * hop + half
+        raw = pcm.frames[max(lo, 0):min(hi, len(pcm))]
+        mono = frames_to_float(raw, pcm.sample_width, pcm.channels).mean(axis=1)
+        left = max(-lo, 0)
+        mono = np.pad(mono, (left, hi - lo - left - len(mono)))
+        frames = np.lib.stride_tricks.sliding_window_view(mono, frame_size)[::hop][:h1 - h0]
+        mag = np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32)
+        spec = np.log1p(100 * mag)
+
+        if prev is None:
+            # 앞이 무음으로 채워진 첫 hop 들은 첫 온전한 창의 스펙트럼으로 (잡음 바닥이 있는 스템이
+            # 0초에 커지는 것처럼 보이지 않게), 첫 hop 은 스템의 바닥 스펙트럼(bin별 중앙값)과 비교
+            # → 0초에 시작하는 소리는 바닥보다 커질 때만 onset
+            edge = min(-(-half // hop), len(spec) - 1)
+            if len(pcm) >= frame_size:
+                spec[:edge] = spec[edge]
+            prev = np.median(spec, axis=0)
+        diff = np.diff(spec, axis=0, prepend=prev[None])
+        flux[h0:h1] = np.maximum(diff, 0).sum(axis=1)
+        k = np.clip(mag.argmax(axis=1), 1, mag.shape[1] - 2)
+        rows = np.arange(len(k))
+        a, b, c = (np.log(mag[rows, k + d] + 1e-9) for d in (-1, 0, 1))
+        peak_bin[h0:h1] = k + 0.5 * (a - c) / np.where(a - 2 * b + c == 0, 1, a - 2 * b + c)
+        prev = spec[-1]
+    return flux, peak_bin
+
+
+def pick_peaks(flux, hop_sec, delta=0.2, window_sec=0.1, min_gap_sec=0.05, baseline_sec=1.0):
+    # 주변 기준값의 1 + delta 배보다 크고, ±window 안의 최댓값인 hop → onset
+    # 기준값 = max(±baseline 중앙값 (잡음 바닥), ±window 평균 (소리가 이어지는 중의 흔들림))
+    # 전체 최댓값으로 나누지 않음 — 튀는 hop 하나가 나머지 onset 을 묻지 않음
+    if not len(flux):
+        return np.zeros(0, dtype=np.int64)
+    flux = np.asarray(flux, dtype=np.float64)
+    w = max(int(round(window_sec / hop_sec)), 1)
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(flux, w, mode="edge"), 2 * w + 1)
+    local_max = windows.max(axis=1)
+    b = max(int(round(baseline_sec / hop_sec)), w)
+    # 끝은 반사로 채움 (같은 값으로 채우면 첫 hop 의 onset 이 자기 중앙값이 됨)
+    padded = np.pad(flux, b, mode="reflect" if len(flux) > b else "edge")
+    baseline = np.empty_like(flux)
+    for i in range(0, len(flux), BLOCK_HOPS):  # 블록 단위 (메모리 = 블록 × 창)
+        part = padded[i:i + min(BLOCK_HOPS, len(flux) - i) + 2 * b]
+        baseline[i:i + len(part) - 2 * b] = np.median(
+            np.lib.stride_tricks.sliding_window_view(part, 2 * b + 1), axis=1)
+    # 디지털 무음 구간은 중앙값이 0 → 상위 1% 플럭스의 1/100 을 바닥으로
+    floor = max(float(np.percentile(flux, 99)) * 0.01, 1e-9)
+    threshold = np.maximum(np.maximum(baseline, windows.mean(axis=1)), floor) * (1 + delta)
+    peaks = np.flatnonzero((flux == local_max) & (flux >= threshold))
+
+    # 너무 가까운 onset은 앞의 것만
+    min_gap = max(int(round(min_gap_sec / hop_sec)), 1)
+    kept = []
+    for p in peaks.tolist():
+        if not kept or p - kept[-1] >= min_gap:
+            kept.append(p)
+    return np.array(kept, dtype=np.int64)
+
+
+def onset_table(pcm, bpm=120, ticks_per_beat=480, frame_size=FRAME_SIZE, hop=HOP, tempo=None, **peak_options):
+    # MIDI 경로와 같은 NoteTable: 시작 = onset, 끝 = 다음 onset, 음높이 = 가장 센 주파수
+    # tempo(TempoMap)를 주면 곡 템포 변화에 맞춰 초 → tick (bpm, ticks_per_beat 대신)
+    flux, peak_bin = spectral_flux(pcm, frame_size, hop)
+    hops = pick_peaks(flux, hop / pcm.sample_rate, **peak_options)
+
+    if tempo is not None:
+        ticks_per_beat = tempo.ticks_per_beat
+        length_ticks = int(tempo.seconds_to_ticks(len(pcm) / pcm.sample_rate))
+        starts = tempo.seconds_to_ticks(hops * hop / pcm.sample_rate)
+    else:
+        ticks_per_sec = bpm / 60 * ticks_per_beat
+        length_ticks = int(round(len(pcm) / pcm.sample_rate * ticks_per_sec))
+        starts = np.round(hops * hop / pcm.sample_rate * ticks_per_sec).astype(np.int64)
+    starts, first = np.unique(starts, return_index=True)
+    hops = hops[first]
+    ends = np.append(starts[1:], max(length_ticks, starts[-1] if len(starts) else 0))
+
+    # 어택 직후(2 hop 뒤 — 창이 어택 뒤 소리만 덮음) 스펙트럼의 최대 bin → MIDI 음높이
+    bins = peak_bin[np.minimum(hops + 2, len(peak_bin) - 1)] if len(hops) else hops
+    freqs = np.maximum(bins * pcm.sample_rate / frame_size, 1e-9)
+    pitch = np.clip(np.round(69 + 12 * np.log2(freqs / 440)), 0, 127)
+    velocity = np.clip(np.round(flux[hops] / max(float(flux.max(initial=0)), 1e-9) * 127), 1, 127)
+
+    zeros = np.zeros(len(starts), dtype=np.int16)
+    return NoteTable(starts, ends, pitch, velocity, zeros, zeros,
+                     ticks_per_beat=ticks_per_beat, length_ticks=length_ticks)
+
+
+if __name__ == "__main__":
+    # python onset.py song.wav [bpm]
+    path = sys.argv[1] if len(sys.argv) > 1 else "song.wav"
+    bpm = float(sys.argv[2]) if len(sys.argv) > 2 else 120
+    table = onset_table(load_pcm(path), bpm)
+    seconds = table.start_tick / (bpm / 60 * table.ticks_per_beat)
+    for sec, pitch, velocity in zip(seconds.tolist(), table.pitch.tolist(), table.velocity.tolist()):
+        print(f"{sec:8.3f}s  note {pitch:3d}  vel {velocity:3d}")
+    print(f"✅ onset {len(table)}개")
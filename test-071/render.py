@@ -0,0 +1,198 @@
+import argparse
+import os
+import re
+
+import numpy as np
+
+from keysound import float_to_frames, frames_to_float, load_pcm, write_wav
+from wav_ids import parse_id
+
+# BMS 오프라인 렌더러 — 외부 플레이어 없이 output.bms 를 WAV 하나로 들어보기/비교하기
+# #WAV 파일은 한 번씩만 읽어 float 샘플 캐시에 두고, 키음별로 모아 출력 버퍼에 offset-add
+# python render.py output.bms render.wav
+
+channel_line_re = re.compile(r"#(\d{3})([0-9A-Za-z]{2}):(\S*)")
+header_re = re.compile(r"#(WAV|BPM)([0-9A-Za-z]{2}) +(.+)")
+
+SOUND_CHANNELS = ({"01"} | {f"{side}{lane}" for side in (1, 2, 5, 6) for lane in range(1, 10)})
+LN_CHANNELS = {f"{side}{lane}" for side in (5, 6) for lane in range(1, 10)}
+
+
+class BmsChart:
+    # 렌더링에 필요한 것만 읽은 BMS: #WAV 경로, 템포, 소리 이벤트 (박자 위치, 채널, WAV 번호)
+    def __init__(self, path):
+        self.path = path
+        self.base = 36
+        self.bpm = 130.0
+        self.lnobj = None
+        self.wav_files = {}  # WAV 번호 -> 파일 경로 (BMS 기준 상대 경로 그대로)
+        self.measure_lengths = {}  # 마디 -> 길이 배율 (채널 02)
+
+        lines = []
+        headers = []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if m := channel_line_re.fullmatch(line):
+                    lines.append((int(m.group(1)), m.group(2).upper(), m.group(3)))
+                elif line.startswith("#"):
+                    headers.append(line)
+
+        # #BASE 62 를 알아야 번호를 읽을 수 있으므로 헤더는 두 번에 나눠 처리
+        if "#BASE 62" in headers:
+            self.base = 62
+        bpm_defs = {}
+        lnobj = None
+        for line in headers:
+            if m := header_re.fullmatch(line):
+                kind, label, value = m.groups()
+                if kind == "WAV":
+                    self.wav_files[parse_id(label, self.base)] = value.strip()
+                else:
+                    bpm_defs[parse_id(label, self.base)] = float(value)
+            elif line.upper().startswith("#BPM "):
+                self.bpm = float(line[5:])
+            elif line.upper().startswith("#LNOBJ "):
+                lnobj = line[7:9]
+        self.lnobj = parse_id(lnobj, self.base) if lnobj else None
+
+        tempo_changes = []  # (마디, 마디 내 위치, BPM)
+        notes = []  # (마디, 마디 내 위치, 채널, WAV 번호)
+        for measure, channel, data in lines:
+            if channel == "02":
+                self.measure_lengths[measure] = float(data)
+                continue
+            if channel not in SOUND_CHANNELS and channel not in ("03", "08"):
+                continue
+            cells = [data[i:i + 2] for i in range(0, len(data) - 1, 2)]
+            for i, cell in enumerate(cells):
+                if cell == "00":
+                    continue
+                pos = i / len(cells)
+                if channel == "03":
+                    tempo_changes.append((measure, pos, float(int(cell, 16))))
+                elif channel == "08":
+                    bpm = bpm_defs.get(parse_id(cell, self.base))
+                    if bpm is not None:
+                        tempo_changes.append((measure, pos, bpm))
+                else:
+                    notes.append((measure, pos, channel, parse_id(cell, self.base)))
+
+        # 롱노트 꼬리는 소리가 없음: 5x/6x 는 채널마다 머리/꼬리 번갈아, #LNOBJ 는 그 번호가 꼬리
+        notes.sort(key=lambda n: (n[2], n[0], n[1]))
+        heads = []
+        ln_count = {}
+        for measure, pos, channel, wav_id in notes:
+            if channel in LN_CHANNELS:
+                ln_count[channel] = ln_count.get(channel, 0) + 1
+                if ln_count[channel] % 2 == 0:
+                    continue
+            elif wav_id == self.lnobj:
+                continue
+            heads.append((measure, pos, channel, wav_id))
+
+        last_measure = max([n[0] for n in heads] + [t[0] for t in tempo_changes], default=0)
+        lengths = np.array([4 * self.measure_lengths.get(m, 1.0) for m in range(last_measure + 2)])
+        self.measure_beats = np.concatenate(([0.0], np.cumsum(lengths)))  # 마디 시작 박자
+
+        def beats(measure, pos):
+            return self.measure_beats[measure] + lengths[measure] * pos
+
+        tempo_changes.sort(key=lambda t: (t[0], t[1]))
+        self.tempo_beats = np.array([0.0] + [beats(m, p) for m, p, _ in tempo_changes])
+        self.tempo_bpms = np.array([self.bpm] + [bpm for *_, bpm in tempo_changes])
+        self.tempo_seconds = np.concatenate(
+            ([0.0], np.cumsum(np.diff(self.tempo_beats) * 60 / self.tempo_bpms[:-1])))
+
+        self.beats = np.array([beats(m, p) for m, p, _, _ in heads], dtype=np.float64)
+        self.channels = [c for _, _, c, _ in heads]
+        self.wav_ids = np.array([w for *_, w in heads], dtype=np.int64)
+
+    def beats_to_seconds(self, beats):
+        # 같은 박자에 템포 변경이 여러 번이면 마지막 것 (searchsorted right)
+        beats = np.asarray(beats, dtype=np.float64)
+        i = np.searchsorted(self.tempo_beats, beats, side="right") - 1
+        return self.tempo_seconds[i] + (beats - self.tempo_beats[i]) * 60 / self.tempo_bpms[i]
+
+    @property
+    def seconds(self):
+        return self.beats_to_seconds(self.beats)
+
+
+def load_samples(chart, wav_ids, sample_rate=None, cache_dir=None):
+    # 쓰이는 #WAV 파일만 한 번씩 읽어 (프레임 수, 채널) float32 로
+    # 반환: ({WAV 번호: 샘플}, 샘플레이트) — 샘플레이트가 다른 파일은 선형 보간으로 맞춤
+    folder = os.path.dirname(os.path.abspath(chart.path))
+    samples = {}
+    for wav_id in np.unique(wav_ids).tolist():
+        name = chart.wav_files.get(wav_id)
+        path = os.path.join(folder, name) if name else None
+        if path is None or not os.path.exists(path):
+            print(f"⚠️ #WAV 없음: {name or wav_id}")
+            continue
+        pcm = load_pcm(path, cache_dir)
+        x = frames_to_float(pcm.frames, pcm.sample_width, pcm.channels)
+        if sample_rate is None:
+            sample_rate = pcm.sample_rate
+        if pcm.sample_rate != sample_rate and len(x):
+            n = max(int(len(x) * sample_rate / pcm.sample_rate), 1)
+            t = np.arange(n) * pcm.sample_rate / sample_rate
+            x = np.column_stack([np.interp(t, np.arange(len(x)), x[:, c]) for c in range(x.shape[1])])
+        samples[wav_id] = x.astype(np.float32)
+    return samples, sample_rate or 44100
+
+
+def mix(offsets, wav_ids, samples, channels=2):
+    # offsets: 이벤트 시작 프레임, wav_ids: 이벤트별 WAV 번호
+    # 같은 키음끼리 모아서 (채널 맞춤은 키음당 한 번) 시작 프레임마다 더함
+    offsets = np.asarray(offsets, dtype=np.int64)
+    wav_ids = np.asarray(wav_ids, dtype=np.int64)
+    ends = [offset + len(samples[w]) for offset, w in zip(offsets.tolist(), wav_ids.tolist()) if w in samples]
+    out = np.zeros((max(ends, default=0), channels), dtype=np.float32)
+
+    order = np.argsort(wav_ids, kind="stable")
+    ids, first = np.unique(wav_ids[order], return_index=True)
+    for wav_id, group in zip(ids.tolist(), np.split(order, first[1:])):
+        sample = samples.get(wav_id)
+        if sample is None or not len(sample):
+            continue
+        if sample.shape[1] != channels:
+            sample = np.repeat(sample[:, :1], channels, axis=1) if sample.shape[1] == 1 else sample[:, :channels]
+        # 이벤트마다 출력 버퍼의 연속 구간 view 에 더함 (fancy index 묶음보다 메모리 이동이 적음)
+        for start in offsets[group].tolist():
+            out[start:start + len(sample)] += sample
+    return out
+
+
+def render(chart, sample_rate=None, cache_dir=None, channels=None):
+    # 차트 전체 (또는 channels 에 든 채널의 노트만) → ((프레임 수, 채널) float32, 샘플레이트)
+    # 키음 파일은 스템끼리 공유될 수 있으므로 (dedup) 스템별로 들으려면 파일이 아니라 레인으로 고름
+    keep = np.array([channels is None or c in channels for c in chart.channels], dtype=bool)
+    wav_ids = chart.wav_ids[keep]
+    samples, sample_rate = load_samples(chart, wav_ids, sample_rate, cache_dir)
+    n_channels = max((s.shape[1] for s in samples.values()), default=2)
+    offsets = np.round(chart.seconds[keep] * sample_rate).astype(np.int64)
+    return mix(offsets, wav_ids, samples, n_channels), sample_rate
+
+
+def write_render(path, audio, sample_rate, sample_width=2):
+    # 클리핑은 잘라서 기록하고 개수만 보고
+    clipped = int((np.abs(audio) > 1.0).sum())
+    write_wav(path, float_to_frames(audio, sample_width), sample_rate, audio.shape[1], sample_width)
+    return clipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BMS → WAV 오프라인 렌더링")
+    parser.add_argument("bms", nargs="?", default="output.bms")
+    parser.add_argument("output", nargs="?", default="render.wav")
+    parser.add_argument("--sample-rate", type=int, default=None, help="기본 = 첫 키음의 샘플레이트")
+    parser.add_argument("--cache-dir", default=None, help="mp3/ogg 키음 디코딩 캐시")
+    args = parser.parse_args()
+
+    chart = BmsChart(args.bms)
+    audio, sample_rate = render(chart, args.sample_rate, args.cache_dir)
+    clipped = write_render(args.output, audio, sample_rate)
+    peak = float(np.abs(audio).max(initial=0))
+    print(f"🔊 노트 {len(chart.wav_ids)}개 → {args.output} ({len(audio) / sample_rate:.1f}초, "
+          f"peak {20 * np.log10(max(peak, 1e-6)):.1f} dBFS, 클리핑 {clipped}샘플)")
@@ -0,0 +1,68 @@
+import numpy as np
+
+from keysound import PcmBuffer, frames_to_float, is_streamed, load_pcm, stream_blocks, STREAM_CHUNK
+
+# 스템 전체의 peak 엔벨로프(창별 dBFS)를 한 번 만들어 두고
+# 노트 구간마다 창 번호로만 계산 → 무음 구간은 키음 없이, 뒤쪽 무음은 잘라냄
+
+WINDOW_MS = 10
+
+
+class Envelope:
+    # db[i] = i번째 창(window 프레임)의 최대 절댓값 (dBFS)
+    def __init__(self, db, window, sample_rate):
+        self.db = db
+        self.window = window
+        self.sample_rate = sample_rate
+
+
+def envelope(blocks, window_ms=WINDOW_MS):
+    # blocks: 앞에서부터 이어지는 PcmBuffer 조각들 (memmap 스템 또는 ffmpeg 스트림)
+    peaks = []
+    rest = np.zeros(0, dtype=np.float32)  # 창을 다 못 채운 나머지 샘플
+    window = sample_rate = None
+    for block in blocks:
+        if window is None:
+            sample_rate = block.sample_rate
+            window = max(sample_rate * window_ms // 1000, 1)
+        x = np.abs(frames_to_float(block.frames, block.sample_width, block.channels)).max(axis=1)
+        x = np.concatenate((rest, x))
+        usable = len(x) // window * window
+        peaks.append(x[:usable].reshape(-1, window).max(axis=1))
+        rest = x[usable:]
+    if len(rest):
+        peaks.append(rest.max(keepdims=True))
+    peak = np.concatenate(peaks) if peaks else np.zeros(0, dtype=np.float32)
+    return Envelope(20 * np.log10(np.maximum(peak, 1e-6)), window or 1, sample_rate or 44100)
+
+
+def stem_envelope(path, cache_dir=None, window_ms=WINDOW_MS):
+    # 캐시 없는 압축 스템은 ffmpeg 스트림으로, 나머지는 memmap/캐시에서 블록 단위로
+    if is_streamed(path, cache_dir):
+        return envelope(stream_blocks(path), window_ms)
+    pcm = load_pcm(path, cache_dir)
+    blocks = (PcmBuffer(pcm.frames[i:i + STREAM_CHUNK], pcm.sample_rate, pcm.channels, pcm.sample_width)
+              for i in range(0, len(pcm), STREAM_CHUNK))
+    return envelope(blocks, window_ms)
+
+
+def trim_silence(env, starts_ms, lengths_ms, threshold_db=-60, min_ms=50):
+    # 반환: (남길 구간 bool 배열, 뒤쪽 무음을 잘라낸 길이 배열)
+    # 구간 안에 threshold_db 이상인 창이 하나도 없으면 무음 → 버림
+    # 마지막으로 소리가 있는 창 끝까지만 남김 (min_ms 보다 짧아지지는 않음)
+    starts_ms = np.asarray(starts_ms, dtype=np.float64)
+    lengths_ms = np.asarray(lengths_ms, dtype=np.float64)
+    if not len(env.db):
+        return np.zeros(len(starts_ms), dtype=bool), lengths_ms
+
+    loud = env.db >= threshold_db
+    last_loud = np.maximum.accumulate(np.where(loud, np.arange(len(loud)), -1))
+    first = np.round(np.maximum(starts_ms, 0) * env.sample_rate / 1000).astype(np.int64) // env.window
+    end_frame = np.round(np.maximum(starts_ms + lengths_ms, 0) * env.sample_rate / 1000).astype(np.int64)
+    last = np.minimum(-(-end_frame // env.window), len(loud)) - 1  # 구간에 걸친 마지막 창
+    last = np.where(last >= 0, last_loud[np.maximum(last, 0)], -1)
+    keep = last >= first
+
+    trimmed_ms = (last + 1) * env.window * 1000 / env.sample_rate - starts_ms
+    lengths = np.where(keep, np.clip(trimmed_ms, min_ms, np.maximum(lengths_ms, min_ms)), lengths_ms)
+    return keep, lengths
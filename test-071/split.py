@@ -0,0 +1,127 @@
+import os
+
+import numpy as np
+from mido import MidiFile, MidiTrack, Message, MetaMessage
+
+from intervals import partition_intervals
+from note_table import NoteTable
+
+
+class Partition:
+    # 공유 NoteTable 위의 인덱스 (복사 없음)
+    # 파일로 쓰지 않고 바로 키음/BMS 단계로 넘김
+    def __init__(self, name, table, index):
+        self.name = name
+        self.table = table
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def notes(self):
+        return self.table.take(self.index)
+
+
+def split_by_pitch(table):
+    # 음높이별 파티션, 같은 음이 겹치면 트랙을 더 나눔 (test-021: note_{pitch}_track{n})
+    order = np.argsort(table.pitch, kind="stable")
+    bounds = np.flatnonzero(np.diff(table.pitch[order])) + 1
+    partitions = []
+    for idx in np.split(order, bounds):
+        if not len(idx):
+            continue
+        pitch = int(table.pitch[idx[0]])
+        assignment, n_tracks = partition_intervals(table.start_tick[idx], table.end_tick[idx])
+        for i in range(n_tracks):
+            partitions.append(Partition(f"note_{pitch}_track{i+1}", table, idx[assignment == i]))
+    return partitions
+
+
+def split_by_layer(table):
+    # 동시에 울리는 노트를 서로 다른 layer로 (test-022: layer_{n:02d})
+    assignment, n_layers = partition_intervals(table.start_tick, table.end_tick)
+    return [Partition(f"layer_{i+1:02d}", table, np.flatnonzero(assignment == i))
+            for i in range(n_layers)]
+
+
+def split_notes(table, mode):
+    if mode == "pitch":
+        return split_by_pitch(table)
+    if mode == "layer":
+        return split_by_layer(table)
+    raise ValueError(f"알 수 없는 split 모드: {mode}")
+
+
+def _part_track(part, end_tick=None):
+    # 파티션 → MidiTrack (요청할 때만 만듦)
+    notes = part.notes()
+    events = []
+    for start, end, note, velocity, channel in zip(notes.start_tick.tolist(), notes.end_tick.tolist(),
+                                                   notes.pitch.tolist(), notes.velocity.tolist(),
+                                                   notes.channel.tolist()):
+        events.append((start, 1, Message("note_on", note=note, velocity=velocity, channel=channel)))
+        events.append((end, 0, Message("note_off", note=note, velocity=0, channel=channel)))
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    tr = MidiTrack()
+    abs_time = 0
+    for t, _, msg in events:
+        tr.append(msg.copy(time=t - abs_time))
+        abs_time = t
+    if end_tick is not None:
+        tr.append(MetaMessage("end_of_track", time=max(end_tick - abs_time, 0)))
+    return tr
+
+
+def _meta_track(mid):
+    meta_track = MidiTrack()
+    for msg in mid.tracks[0]:
+        if msg.is_meta and msg.type != "end_of_track":
+            meta_track.append(msg.copy(time=0))
+    return meta_track
+
+
+def write_partitions(mid, partitions, output_dir):
+    # .mid 파일이 필요할 때만: 파티션마다 메타 트랙 + 노트 트랙
+    os.makedirs(output_dir, exist_ok=True)
+    meta_track = _meta_track(mid)
+    for part in partitions:
+        out = MidiFile(ticks_per_beat=mid.ticks_per_beat)
+        out.tracks.append(meta_track.copy())
+        out.tracks.append(_part_track(part, part.table.length_ticks))
+        filename = os.path.join(output_dir, f"{part.name}.mid")
+        out.save(filename)
+        print(f"🎵 Saved {filename}")
+    print(f"\n✅ 총 {len(partitions)}개의 MIDI 파일 생성 완료 (폴더: {output_dir})")
+
+
+def split_overlapping_notes(input_path):
+    # test-016 과 같은 결과: 겹치지 않게 최소 트랙으로 분배
+    # 노트 짝짓기는 deque(FIFO), 트랙 배정은 끝 시간 min-heap → O(n log k)
+    midi = MidiFile(input_path)
+    table = NoteTable.from_midi(midi, pairing="queue")
+    partitions = split_by_layer(table)
+    print(f"총 {len(partitions)}개 트랙으로 분리됨")
+
+    meta_track = _meta_track(midi)
+    out = MidiFile(ticks_per_beat=midi.ticks_per_beat)
+    out.tracks.append(meta_track)
+    for part in partitions:
+        out.tracks.append(_part_track(part))
+
+    # 전체 합친 파일 저장
+    out.save("output_combined.mid")
+
+    # 트랙별로 개별 저장
+    for i, tr in enumerate(out.tracks[1:], start=0):
+        single = MidiFile()
+        single.ticks_per_beat = midi.ticks_per_beat
+        single.tracks.append(meta_track.copy())
+        single.tracks.append(tr.copy())
+        single.save(f"output_track_{i}.mid")
+
+    print("✅ 저장 완료: output_combined.mid 및 output_track_*.mid")
+
+
+if __name__ == "__main__":
+    split_overlapping_notes("input.mid")
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def _bpm(tempo):
+    # μs per beat → BPM (소수 셋째 자리까지)
+    return round(60000000 / tempo, 3)
+
+
+class TempoMap:
+    # 모든 MIDI, 모든 트랙의 set_tempo를 한 번에 모아 정렬한 구간 색인
+    # ticks[i] 부터 tempos[i] (μs/beat) 적용, seconds[i] = ticks[i] 시점의 누적 초
+    # mids: MidiFile 하나 또는 여러 개 (스템마다 템포가 따로 있어도 곡 템포는 하나)
+    # ticks_per_beat: 이 해상도로 tick을 맞춤 (None = 첫 MIDI 해상도)
+    def __init__(self, mids, default_bpm=120, ticks_per_beat=None):
+        mids = [mids] if hasattr(mids, "tracks") else list(mids)
+        self.ticks_per_beat = ticks_per_beat or mids[0].ticks_per_beat
+
+        changes = {0: 60000000 / default_bpm}
+        for mid in mids:
+            for track in mid.tracks:
+                tick = 0
+                for msg in track:
+                    tick += msg.time
+                    if msg.type == "set_tempo":
+                        changes[round(tick * self.ticks_per_beat / mid.ticks_per_beat)] = msg.tempo
+
+        ticks = sorted(changes)
+        self.ticks = np.array(ticks, dtype=np.int64)
+        self.tempos = np.array([changes[t] for t in ticks], dtype=np.float64)
+        self._sec_per_tick = self.tempos / 1e6 / self.ticks_per_beat
+        self.seconds = np.concatenate(
+            ([0.0], np.cumsum(np.diff(self.ticks) * self._sec_per_tick[:-1])))
+
+    @property
+    def initial_bpm(self):
+        return _bpm(self.tempos[0])
+
+    def ticks_to_seconds(self, ticks):
+        # 이진 탐색으로 구간을 찾아 배열 전체를 한 번에 변환
+        ticks = np.asarray(ticks, dtype=np.int64)
+        i = np.searchsorted(self.ticks, ticks, side="right") - 1
+        return self.seconds[i] + (ticks - self.ticks[i]) * self._sec_per_tick[i]
+
+    def seconds_to_ticks(self, seconds):
+        # ticks_to_seconds의 역변환 (가장 가까운 tick으로 반올림)
+        seconds = np.asarray(seconds, dtype=np.float64)
+        i = np.searchsorted(self.seconds, seconds, side="right") - 1
+        return self.ticks[i] + np.round((seconds - self.seconds[i]) / self._sec_per_tick[i]).astype(np.int64)
+
+    @property
+    def ticks_per_measure(self):
+        return self.ticks_per_beat * 4
+
+    def bms_tempo_events(self, to_id):
+        # 0 tick 이후 템포 변경을 BMS로 변환
+        # 정수 BPM 1~255 → 채널 03 (16진수), 그 외 → #BPMxx 정의 + 채널 08
+        # 반환: (헤더 줄 목록, [(tick, 채널, 값)]) — 값: 03은 BPM 정수, 08은 #BPM 번호
+        header = []
+        events = []
+        bpm_ids = {}
+        for tick, tempo in zip(self.ticks[1:].tolist(), self.tempos[1:]):
+            bpm = _bpm(tempo)
+            if bpm == int(bpm) and 1 <= bpm <= 255:
+                events.append((tick, "03", int(bpm)))
+                continue
+            if bpm not in bpm_ids:
+                bpm_ids[bpm] = len(bpm_ids) + 1
+                header.append(f"#BPM{to_id(bpm_ids[bpm])} {bpm:g}")
+            events.append((tick, "08", bpm_ids[bpm]))
+        return header, events
@@ -0,0 +1,169 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import batch
+import main
+from keysound import frames_to_float, load_pcm
+from longnote import is_playable, ln_channel
+from render import BmsChart, render
+
+# 만든 차트가 원래 스템을 그대로 재현하는지 확인 (빌드 게이트용, 실패하면 종료 코드 1)
+# 스템별 레인만 렌더링 → 마디 창마다 원본 스템과 FFT 상호상관
+# 창별 정렬 오차(상관 최대 지연)와 잔차 에너지(원본 대비 dB)를 보고
+# 지연은 파형이 아니라 어택(엔벨로프 상승) 신호로 찾음 — 음정 있는 소리는 파형 상관이 주기마다 봉우리를 만듦
+# python verify.py output.bms
+# python verify.py --song songs/a   (batch.py 곡 폴더: song.json 설정으로 스템/레인 결정)
+
+SEARCH_MS = 10        # 상관 최대 지연을 찾는 범위 (±)
+MAX_LAG_MS = 1.0      # 이보다 어긋나면 실패
+MIN_PEAK = 0.9        # 정규화 상관 최대값이 이보다 낮으면 (렌더링과 원본 어택 모양이 다름) 지연 판정 안 함
+ENVELOPE_MS = 5       # 어택 신호용 엔벨로프 평활 길이 (저음 반송파 맥동 제거)
+MAX_RESIDUAL_DB = -20  # 원본 대비 잔차가 이보다 크면 실패
+QUIET_DB = -50        # 원본이 이보다 조용한 창은 판정하지 않음 (무음 노트 제외 구간)
+FFT_BATCH = 1 << 23   # 한 번에 FFT 할 (창 수 × FFT 길이)
+
+
+def stem_groups(settings=None):
+    # 빌드 설정(main.py 기본값 또는 batch.py song.json) → [(이름, 원본 스템 경로들, 렌더링할 채널 집합 또는 None=전체)]
+    # 레인을 재배치했거나 파티션으로 나눈 차트는 스템을 레인으로 구분할 수 없으므로 전체 믹스 하나로
+    settings = settings or {name: getattr(main, name) for name in main.SETTINGS}
+    stems = list(zip(settings["instrument_names"], settings["wav_files"]))
+    if settings["split_mode"] or settings["channel_remap"] or settings["bake_bgm"]:
+        return [("mix", [path for _, path in stems if os.path.exists(path)], None)]
+    groups = []
+    for idx, (name, path) in enumerate(stems):
+        if not os.path.exists(path):
+            continue
+        lane = f"{settings['base_lane'] + idx:02}"
+        groups.append((name, [path], {lane, ln_channel(lane)} if is_playable(lane) else {lane}))
+    return groups
+
+
+def to_mono(path, cache_dir=None):
+    pcm = load_pcm(path, cache_dir)
+    return frames_to_float(pcm.frames, pcm.sample_width, pcm.channels).mean(axis=1), pcm.sample_rate
+
+
+def attack_signal(x, sample_rate, smooth_ms=ENVELOPE_MS):
+    # |x| 를 smooth_ms 평균한 엔벨로프의 상승분만 — 반송파 주기 없이 어택 위치만 남음
+    n = max(sample_rate * smooth_ms // 1000, 1)
+    c = np.concatenate(([0.0], np.cumsum(np.abs(x), dtype=np.float64)))
+    env = (c[n:] - c[:-n]) / n
+    env = np.concatenate((np.zeros(n - 1), env))
+    return np.maximum(np.diff(env, prepend=0.0), 0).astype(np.float32)
+
+
+def measure_bounds(chart, sample_rate, n_frames):
+    # 마디 경계 (프레임) — 마지막 노트 뒤로 소리가 이어지면 (BGM 베이크 등) 마지막 마디 길이로 계속 나눔
+    beats = chart.measure_beats
+    step = beats[-1] - beats[-2]
+    while chart.beats_to_seconds(beats[-1]) * sample_rate < n_frames:
+        beats = np.append(beats, beats[-1] + step)
+    seconds = chart.beats_to_seconds(beats)
+    bounds = np.unique(np.clip(np.round(seconds * sample_rate).astype(np.int64), 0, n_frames))
+    if bounds[-1] < n_frames:
+        bounds = np.append(bounds, n_frames)
+    return bounds
+
+
+def compare_windows(ref, test, bounds, search, ref_attack, test_attack):
+    # 창마다 어택 신호의 FFT 상호상관 c[k] = Σ ref[n]·test[n+k] 의 최대 지연 k (test 가 늦으면 +)
+    # 반환: (지연 프레임 배열 — 봉우리가 뚜렷하지 않으면 NaN, 잔차 dB 배열, 원본 dB 배열)
+    n = len(bounds) - 1
+    lengths = np.diff(bounds)
+    size = 1 << int(2 * lengths.max() - 1).bit_length()  # 원형 상관이 겹치지 않는 FFT 길이
+    lags = np.zeros(n)
+    residual_db = np.zeros(n)
+    ref_db = np.zeros(n)
+    step = max(FFT_BATCH // size, 1)
+    for b0 in range(0, n, step):
+        rows = range(b0, min(b0 + step, n))
+        r = np.zeros((len(rows), size), dtype=np.float32)
+        t = np.zeros((len(rows), size), dtype=np.float32)
+        ra = np.zeros((len(rows), size), dtype=np.float32)
+        ta = np.zeros((len(rows), size), dtype=np.float32)
+        for j, i in enumerate(rows):
+            r[j, :lengths[i]] = ref[bounds[i]:bounds[i + 1]]
+            t[j, :lengths[i]] = test[bounds[i]:bounds[i + 1]]
+            ra[j, :lengths[i]] = ref_attack[bounds[i]:bounds[i + 1]]
+            ta[j, :lengths[i]] = test_attack[bounds[i]:bounds[i + 1]]
+        corr = np.fft.irfft(np.conj(np.fft.rfft(ra, axis=1)) * np.fft.rfft(ta, axis=1), n=size, axis=1)
+        candidates = np.concatenate((corr[:, size - search:], corr[:, :search + 1]), axis=1)
+        norm = np.sqrt((ra.astype(np.float64) ** 2).sum(axis=1) * (ta.astype(np.float64) ** 2).sum(axis=1))
+        peak = candidates.max(axis=1) / np.maximum(norm, 1e-12)
+        lags[b0:b0 + len(rows)] = np.where(peak >= MIN_PEAK, np.argmax(candidates, axis=1) - search, np.nan)
+
+        ref_energy = (r.astype(np.float64) ** 2).sum(axis=1)
+        err_energy = ((r - t).astype(np.float64) ** 2).sum(axis=1)
+        ref_db[b0:b0 + len(rows)] = 10 * np.log10(np.maximum(ref_energy / np.maximum(lengths[b0:b0 + len(rows)], 1),
+                                                              1e-12))
+        residual_db[b0:b0 + len(rows)] = 10 * np.log10(np.maximum(err_energy, 1e-12) / np.maximum(ref_energy, 1e-12))
+    return lags, residual_db, ref_db
+
+
+def verify(bms_path, groups, cache_dir=None, search_ms=SEARCH_MS, max_lag_ms=MAX_LAG_MS,
+           max_residual_db=MAX_RESIDUAL_DB, quiet_db=QUIET_DB):
+    # 반환: {이름: [(마디, 지연 ms, 잔차 dB), ...] 실패한 창}, 스템별 요약 줄도 출력
+    chart = BmsChart(bms_path)
+    failures = {}
+    for name, paths, channels in groups:
+        ref = None
+        for path in paths:
+            mono, sample_rate = to_mono(path, cache_dir)
+            if ref is None:
+                ref = mono
+            else:
+                n = max(len(ref), len(mono))
+                ref = np.pad(ref, (0, n - len(ref))) + np.pad(mono, (0, n - len(mono)))
+        audio, _ = render(chart, sample_rate, cache_dir, channels)
+        test = audio.mean(axis=1) if len(audio) else np.zeros(0, dtype=np.float32)
+        n = max(len(ref), len(test))
+        ref = np.pad(ref, (0, n - len(ref)))
+        test = np.pad(test, (0, n - len(test)))
+
+        bounds = measure_bounds(chart, sample_rate, n)
+        lags, residual_db, ref_db = compare_windows(ref, test, bounds, sample_rate * search_ms // 1000,
+                                                    attack_signal(ref, sample_rate), attack_signal(test, sample_rate))
+        lag_ms = lags * 1000 / sample_rate
+        # 창 하나 = 마디 하나
+        measures = np.arange(len(bounds) - 1)
+        checked = ref_db >= quiet_db
+        bad = checked & ((np.abs(np.nan_to_num(lag_ms)) > max_lag_ms) | (residual_db > max_residual_db))
+        failures[name] = list(zip(measures[bad].tolist(), lag_ms[bad].tolist(), residual_db[bad].tolist()))
+
+        worst_lag = float(np.abs(np.nan_to_num(lag_ms[checked])).max(initial=0))
+        worst_residual = float(residual_db[checked].max(initial=-120))
+        mark = "❌" if bad.any() else "✅"
+        print(f"{mark} {name}: 마디 {int(checked.sum())}개 확인, 최대 어긋남 {worst_lag:.2f}ms, "
+              f"최대 잔차 {worst_residual:.1f}dB, 실패 {int(bad.sum())}개")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BMS 렌더링 ↔ 원본 스템 마디별 비교 (실패하면 종료 코드 1)")
+    parser.add_argument("bms", nargs="?", default=None, help="기본 = 설정의 bms_path")
+    parser.add_argument("--song", default=None, help="batch.py 곡 폴더 (song.json 설정 사용)")
+    parser.add_argument("--search-ms", type=int, default=SEARCH_MS)
+    parser.add_argument("--max-lag-ms", type=float, default=MAX_LAG_MS)
+    parser.add_argument("--max-residual-db", type=float, default=MAX_RESIDUAL_DB)
+    parser.add_argument("--quiet-db", type=float, default=QUIET_DB)
+    args = parser.parse_args()
+
+    settings = None
+    bms_path = os.path.abspath(args.bms) if args.bms else None
+    if args.song:
+        settings = batch.load_manifest(args.song)
+        os.chdir(args.song)  # song.json 의 경로는 곡 폴더 기준
+    bms_path = bms_path or (settings or {}).get("bms_path", main.bms_path)
+    cache_dir = (settings or {}).get("pcm_cache_dir", main.pcm_cache_dir)
+    failures = verify(bms_path, stem_groups(settings), cache_dir, args.search_ms, args.max_lag_ms,
+                      args.max_residual_db, args.quiet_db)
+    for name, windows in failures.items():
+        for measure, lag_ms, residual in windows:
+            lag = "판정 안 함" if np.isnan(lag_ms) else f"{lag_ms:+.2f}ms"
+            print(f"  {name} #{measure:03}: 어긋남 {lag}, 잔차 {residual:.1f}dB")
+    if any(failures.values()):
+        sys.exit(1)
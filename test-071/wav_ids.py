@@ -0,0 +1,36 @@
+from intervals import partition_intervals
+
+# #WAV / #BPM 번호 (2자리)
+# 기본 36진수 = 01~ZZ (1295개), #BASE 62 = 대소문자 구분 01~zz (3843개)
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+MAX_ID = {36: 36 * 36 - 1, 62: 62 * 62 - 1}
+
+
+def to_id(n, base=36):
+    if not 0 <= n <= MAX_ID[base]:
+        raise ValueError(f"번호 {n}: {base}진수 2자리 범위(최대 {MAX_ID[base]})를 넘음")
+    q, r = divmod(n, base)
+    return DIGITS[q] + DIGITS[r]
+
+
+def parse_id(text, base=36):
+    if base == 36:
+        text = text.upper()  # 36진수는 대소문자 구분 없음
+    return DIGITS.index(text[0]) * base + DIGITS.index(text[1])
+
+
+def rebase_id(n, old_base, new_base):
+    # 같은 2글자 이름을 다른 진법으로 읽은 값 (#BASE 62로 바꿔도 기존 #WAV 이름은 그대로)
+    return parse_id(to_id(n, old_base), new_base)
+
+
+def choose_base(max_id):
+    return 36 if max_id <= MAX_ID[36] else 62
+
+
+def assign_slots(starts, ends):
+    # 키음별 사용 구간 [처음 울리는 시점, 마지막으로 끝나는 시점) → 구간 그래프 색칠
+    # 겹치지 않는 키음끼리 같은 슬롯 → 슬롯 수 = 동시에 필요한 최대 키음 수 (O(n log n))
+    # 반환: (키음별 슬롯 번호 배열, 슬롯 수)
+    return partition_intervals(starts, ends)